@@ -1,12 +1,73 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
-import requests
-import io
+from collections import OrderedDict
 from PIL import Image, ImageTk
 import json
 import time
 import os
-from logic import fetch_evolution_data, fetch_pokemon_data, fetch_species_data
+import logic
+from logic import fetch_chain_bundle, fetch_evolution_data, fetch_moveset, fetch_name_index, fetch_pokemon_data, fetch_species_data, fetch_sprite_frames, fetch_sprite_image, fetch_stats_table
+from move_index import SORT_KEYS as MOVE_SORT_KEYS
+from background import UiExecutor
+import perf
+from prefetch import STARTUP, Prefetcher
+from user_data import load_user_data, save_user_data
+from records import STAT_NAMES
+from stats_store import SORT_KEYS as BROWSE_SORT_KEYS
+from team_analysis import TYPES, Roster, analyze_team, recommend_members
+
+POKEBALL_IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "image", "pokeball.png")
+COMPETITIVE_MOVES = ["stealth-rock", "earthquake", "recover", "toxic", "spikes", "calm-mind", "defog"]  # Example competitive moves
+
+def load_static_image(url):
+    image = fetch_sprite_image(url, (150, 150))
+    if image is None:
+        raise ValueError(f"could not download {url}")
+    return image
+
+def load_animation(url):
+    frames = fetch_sprite_frames(url)
+    if not frames:
+        raise ValueError(f"could not download {url}")
+    return url, frames
+
+def load_pokemon(pokemon_name, dex_number=None):
+    # Species names don't always match a /pokemon/ name (e.g. deoxys), so
+    # fall back to the dex number the name index resolved
+    data = fetch_pokemon_data(pokemon_name)
+    if not data and dex_number is not None:
+        data = fetch_pokemon_data(str(dex_number))
+    return data
+
+def load_evolution(species_url):
+    # Runs on a worker thread: the chain plus every stage's data and resized
+    # sprite, so the Evolution tab can be built without touching the network
+    evolution_data = fetch_evolution_data(species_url)
+    if not evolution_data:
+        return None
+
+    bundle = fetch_chain_bundle(evolution_data['chain'], sprite_size=(150, 150))
+    stages = {name: (data, bundle['sprites'].get(name)) for name, data in bundle['pokemon'].items()}
+    return evolution_data['chain'], stages
+
+PREFETCH_START_DELAY_MS = 1000  # Let the window come up before prefetching
+PREFETCH_BUSY_RETRY_MS = 250  # How often to check whether a search has finished
+
+def run_timed(span_name, fn, *args):
+    with perf.span(span_name):
+        return fn(*args)
+
+def load_team_analysis(team):
+    # Runs on a worker thread. Team members are normally cached already and
+    # the candidates are every Pokémon in the stats table.
+    team_types = []
+    for member in team:
+        data = fetch_pokemon_data(member)
+        if data:
+            team_types.append(data['types'])
+    roster = Roster.from_stats_table(fetch_stats_table())
+    recommendations = recommend_members(team_types, roster, exclude=team) if len(team) < 6 else []
+    return analyze_team(team_types), recommendations
 
 class PokedexApp:
     def __init__(self, root):
@@ -16,7 +77,7 @@ class PokedexApp:
         self.root.configure(bg='#2C3E50')
 
         # Add Pokeball image
-        self.pokeball_image = Image.open("image\\pokeball.png")
+        self.pokeball_image = Image.open(POKEBALL_IMAGE)
         self.pokeball_image = self.pokeball_image.resize((100, 100), Image.LANCZOS)
         self.pokeball_photo = ImageTk.PhotoImage(self.pokeball_image)
         self.pokeball_label = tk.Label(self.root, image=self.pokeball_photo, bg='#2C3E50')
@@ -25,207 +86,201 @@ class PokedexApp:
         self.current_data = None
         self.team = []
         self.favorites = []
-        self.animation_frames = None
+        self.animation_frames = None  # [(PhotoImage, duration in ms)] of the sprite being shown
         self.animation_index = 0
         self.animation_job = None
+        self.animation_cache = OrderedDict()  # Sprite URL -> frames, so re-showing a Pokémon animates instantly
+        self.max_cached_animations = 10
+        self.search_generation = None
+        self.search_name = ""
+        self.deferred_tasks = []  # Background work for hidden tabs, started after the Info tab's
+        self.pending_renders = {}  # Tab -> render waiting for the tab to be shown
+        self.move_index = None  # Details of the current Pokémon's moves, once fetched
+        self.pending_moveset = None  # Moves to fetch details for once the Moves tab is opened
+        self.stats_table = None  # Numeric attributes of every cached Pokémon, for the Browse tab
+        self.browse_rows = []
+        self.browse_loading = False
 
         self.search_history = []  # Store the history of Pokémon searched
         self.max_history = 5  # Limit to the last 5 searches
+        self.name_index = None  # Loaded in the background, search works without it
 
         self.create_widgets()
 
+        # Network and image work runs here so the window never freezes
+        self.executor = UiExecutor(self.root)
+        self.executor.submit(fetch_name_index, on_done=self.set_name_index,
+                             on_error=lambda e: print(f"Name index unavailable: {e}"))
+        self.loading = set()
+        self.trace = None  # perf trace of the current search, None unless perf is enabled
+        self.debug_window = None
+        self.root.bind("<F12>", self.toggle_debug_panel)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # Lists from the last session, and warming them up while idle
+        user_data = load_user_data(logic.USER_DATA_FILE)
+        self.search_history = user_data['history'][:self.max_history]
+        self.favorites = user_data['favorites']
+        self.team = user_data['team']
+        self.update_favorites_tab()
+        self.update_team_tab()
+        self.prefetcher = Prefetcher(max_pokemon=logic.PREFETCH_MAX_POKEMON, bytes_per_second=logic.PREFETCH_BYTES_PER_SECOND,
+                                     neighbours=logic.PREFETCH_NEIGHBOURS)
+        self.prefetcher.add(self.team + self.favorites + self.search_history, STARTUP)
+        self.prefetch_running = False
+        self.prefetch_job = self.root.after(PREFETCH_START_DELAY_MS, self.schedule_prefetch)
+
+    def on_close(self):
+        self.save_user_data()
+        self.executor.shutdown()
+        self.root.destroy()
+
+    def save_user_data(self):
+        try:
+            save_user_data(logic.USER_DATA_FILE, self.search_history, self.favorites, self.team)
+        except OSError as e:
+            print(f"Couldn't save history, favorites and team: {e}")
+
+    def schedule_prefetch(self):
+        # Runs the next prefetch job the next time Tk is idle
+        self.prefetch_job = None
+        if not self.prefetch_running:
+            self.prefetch_job = self.root.after_idle(self.pump_prefetch)
+
+    def pump_prefetch(self):
+        self.prefetch_job = None
+        if self.loading:
+            # A search is running, don't compete with it for the network
+            self.prefetch_job = self.root.after(PREFETCH_BUSY_RETRY_MS, self.pump_prefetch)
+            return
+        job = self.prefetcher.next_job()
+        if job is None:
+            return  # Nothing left until the next search
+        self.prefetch_running = True
+
+        def finished(delay):
+            self.prefetch_running = False
+            self.prefetch_job = self.root.after(int(delay * 1000), self.schedule_prefetch)
+
+        def failed(error):
+            self.prefetch_running = False
+            print(f"Prefetch of {job[1]} failed: {error}")
+            self.schedule_prefetch()
+
+        self.executor.submit(self.prefetcher.run, job, on_done=finished, on_error=failed)
+
     def create_widgets(self):
         # Search box
         self.entry = tk.Entry(self.root, font=('Arial', 14), width=20)
         self.entry.pack(pady=10, padx=20)
         self.entry.bind("<FocusIn>", self.show_search_history)
+        self.entry.bind("<KeyRelease>", self.on_entry_key)
+        self.entry.bind("<Return>", lambda event: self.search_pokemon())
+        self.entry.bind("<Down>", self.focus_suggestions)
+        self.entry.bind("<Escape>", lambda event: self.history_listbox.pack_forget())
         self.search_button = tk.Button(self.root, text="Search", command=self.search_pokemon)
         self.search_button.pack(pady=10)
 
-        # History listbox (hidden initially)
+        # Loading state for searches running in the background
+        self.status_label = tk.Label(self.root, text="", font=('Arial', 10), bg='#2C3E50', fg='white')
+        self.status_label.pack()
+
+        # History and typeahead suggestions listbox (hidden initially)
         self.history_listbox = tk.Listbox(self.root, font=('Arial', 12), height=5)
         self.history_listbox.pack(pady=5, padx=20)
         self.history_listbox.bind("<Double-1>", self.select_from_history)
+        self.history_listbox.bind("<Return>", self.select_from_history)
         self.history_listbox.pack_forget()  # Hide it initially
 
         self.tab_control = ttk.Notebook(self.root)
         self.info_tab = ttk.Frame(self.tab_control)
         self.evolution_tab = ttk.Frame(self.tab_control)
         self.moves_tab = ttk.Frame(self.tab_control)
+        self.browse_tab = ttk.Frame(self.tab_control)
         self.team_tab = ttk.Frame(self.tab_control)
         self.favorites_tab = ttk.Frame(self.tab_control)
         self.tab_control.add(self.info_tab, text='Info')
         self.tab_control.add(self.evolution_tab, text='Evolution')
         self.tab_control.add(self.moves_tab, text='Moves')
+        self.tab_control.add(self.browse_tab, text='Browse')
         self.tab_control.add(self.team_tab, text='Team Builder')
         self.tab_control.add(self.favorites_tab, text='Favorites')
         self.tab_control.pack(expand=1, fill='both')
+        self.tab_control.bind("<<NotebookTabChanged>>", self.on_tab_changed)
 
         self.create_info_tab()
         self.create_evolution_tab()
         self.create_moves_tab()
+        self.create_browse_tab()
         self.create_team_tab()
         self.create_favorites_tab()
 
     def show_search_history(self, event=None):
         # Show the search history when the user focuses on the search box
+        if not self.entry.get().strip():
+            self.show_suggestions(self.search_history)
+
+    def show_suggestions(self, names):
         self.history_listbox.delete(0, tk.END)
-        if self.search_history:
-            for pokemon in self.search_history:
+        if names:
+            for pokemon in names:
                 self.history_listbox.insert(tk.END, pokemon.capitalize())
-            self.history_listbox.pack(pady=5, padx=20)
+            self.history_listbox.pack(pady=5, padx=20, before=self.tab_control)
         else:
             self.history_listbox.pack_forget()
 
-    def search_pokemon(self):
-        # Cancel ongoing animation
-        if self.animation_job:
-            self.root.after_cancel(self.animation_job)
-
-        pokemon_name = self.entry.get().lower()
+    def set_name_index(self, index):
+        self.name_index = index
 
-        # Avoid searching empty strings
-        if pokemon_name.strip() == "":
+    def on_entry_key(self, event):
+        # Typeahead: suggestions follow what is typed, straight from the local index
+        if event.keysym in ('Return', 'Down', 'Up', 'Escape'):
             return
-
-        data = fetch_pokemon_data(pokemon_name)
-
-        if data:
-            # Update search history
-            if pokemon_name not in self.search_history:
-                self.search_history.insert(0, pokemon_name)
-                if len(self.search_history) > self.max_history:
-                    self.search_history.pop()  # Remove oldest history if exceeding max limit
-
-            # Hide search history after selection
-            self.history_listbox.pack_forget()
-
-            self.display_pokemon(data)
-            evolution_data = fetch_evolution_data(data['species_url'])
-            if evolution_data:
-                self.display_evolution_line(evolution_data['chain'])
-                self.display_evolution_methods(evolution_data['chain'])
+        text = self.entry.get().strip().lower()
+        if not text:
+            self.show_suggestions(self.search_history)
+        elif self.name_index is not None:
+            if text.isdigit():
+                resolved = self.name_index.resolve(text)
+                self.show_suggestions([resolved[1]] if resolved else [])
             else:
-                messagebox.showwarning("Warning", "No evolution data found.")
-            self.display_moves(data['moves'])
-        else:
-            messagebox.showerror("Error", f"Pokémon '{pokemon_name}' not found.")
+                self.show_suggestions(self.name_index.complete(text))
+
+    def focus_suggestions(self, event=None):
+        if self.history_listbox.size():
+            self.history_listbox.focus_set()
+            self.history_listbox.selection_clear(0, tk.END)
+            self.history_listbox.selection_set(0)
+            self.history_listbox.activate(0)
+
+    def resolve_query(self, query):
+        # Turns dex numbers into names and catches typos locally before any
+        # network call. Returns (name, dex number or None).
+        if self.name_index is None:
+            return query, None
+        resolved = self.name_index.resolve(query)
+        if resolved:
+            dex_number, pokemon_name = resolved
+            return pokemon_name, dex_number
+        suggestions = self.name_index.correct(query)
+        if suggestions:
+            if messagebox.askyesno("Did you mean?", f"No Pokémon called '{query}'. Did you mean {suggestions[0].capitalize()}?"):
+                self.entry.delete(0, tk.END)
+                self.entry.insert(0, suggestions[0])
+                return suggestions[0], self.name_index.by_name[suggestions[0]]
+        # Not a species name, but could still be a form like 'pikachu-alola'
+        # or 'zygarde-50', which look like typos of the species name
+        return query, None
 
     def select_from_history(self, event):
-        # Select a Pokémon from the search history
-        selected_pokemon = self.history_listbox.get(self.history_listbox.curselection())
-        self.entry.delete(0, tk.END)
-        self.entry.insert(0, selected_pokemon.lower())
-        self.search_pokemon()
-
-    def display_evolution_methods(self, evolution_chain):
-        # This function will extract and display evolution methods from the evolution chain
-        evolution_methods = []
-
-        # Ensure evolution_chain is a dictionary and not empty
-        if not isinstance(evolution_chain, dict):
-            print("Invalid evolution chain data")
+        # Select a Pokémon from the search history or the suggestions
+        if not self.history_listbox.curselection():
             return
-
-        while evolution_chain:
-            species = evolution_chain.get('species', {})
-            species_name = species.get('name', 'Unknown')
-
-            # Extracting the evolution method
-            evolution_details = evolution_chain.get('evolution_details', [])
-
-            if evolution_details:
-                # Check for triggers such as level-up, use of items, or other evolution methods
-                for detail in evolution_details:
-                    method = detail.get('trigger', {}).get('name', 'Unknown')  # Trigger method (e.g., level-up)
-                    item = detail.get('item', {}).get('name', None)  # Item required for evolution
-
-                    if item:
-                        # If an item is required for evolution, display it
-                        evolution_methods.append(f"{species_name} evolves by using {item.replace('-', ' ').title()}.")
-                    elif method and method != 'Unknown':
-                        # If a method is available, display it (e.g., level-up, trade)
-                        evolution_methods.append(f"{species_name} evolves by {method.replace('-', ' ').title()}.")
-                    else:
-                        # If no method is known, just mention that the evolution method is unknown
-                        evolution_methods.append(f"{species_name} evolves.")
-
-            else:
-                # If no detailed evolution method, just mention the evolution chain
-                evolution_methods.append(f"{species_name} evolves.")
-
-            # Move to the next Pokémon in the evolution chain
-            # If there are multiple evolutions, loop through each `evolves_to`
-            evolution_chain = evolution_chain.get('evolves_to', [None])[0]
-
-        # Display the evolution methods in the Evolution tab
-        for widget in self.evolution_tab.winfo_children():
-            widget.destroy()  # Clear the previous content in the Evolution tab
-
-        title_label = tk.Label(self.evolution_tab, text="Evolution Methods:", font=('Arial', 16, 'bold'), bg='#2C3E50', fg='white')
-        title_label.pack(pady=10)
-
-        if evolution_methods:
-            for method in evolution_methods:
-                method_label = tk.Label(self.evolution_tab, text=method, font=('Arial', 12), bg='#2C3E50', fg='white')
-                method_label.pack(pady=5)
-        else:
-            no_method_label = tk.Label(self.evolution_tab, text="No evolution data available.", font=('Arial', 12), bg='#2C3E50', fg='white')
-            no_method_label.pack(pady=10)
-
-
-    def search_pokemon(self):
-        pokemon_name = self.entry.get().lower()
-
-        if pokemon_name.strip() == "":
-            return
-
-        data = fetch_pokemon_data(pokemon_name)
-
-        if data:
-            # Fetch evolution data
-            evolution_data = fetch_evolution_data(data['species_url'])
-            if evolution_data:
-                self.display_evolution_line(evolution_data['chain'])  # For evolutionary line (optional)
-                self.display_evolution_methods(evolution_data['chain'])  # This now shows methods of evolution
-            else:
-                messagebox.showwarning("Warning", "No evolution data found.")
-            self.display_moves(data['moves'])  # Display moves as before
-        else:
-            messagebox.showerror("Error", f"Pokémon '{pokemon_name}' not found.")
-
-    def select_from_history(self, event):
-        # Select a Pokémon from the search history
         selected_pokemon = self.history_listbox.get(self.history_listbox.curselection())
         self.entry.delete(0, tk.END)
         self.entry.insert(0, selected_pokemon.lower())
         self.search_pokemon()
 
-    def create_widgets(self):
-        self.entry = tk.Entry(self.root, font=('Arial', 14), width=20)
-        self.entry.pack(pady=10, padx=20)
-        self.search_button = tk.Button(self.root, text="Search", command=self.search_pokemon)
-        self.search_button.pack(pady=10)
-
-        self.tab_control = ttk.Notebook(self.root)
-        self.info_tab = ttk.Frame(self.tab_control)
-        self.evolution_tab = ttk.Frame(self.tab_control)
-        self.moves_tab = ttk.Frame(self.tab_control)
-        self.team_tab = ttk.Frame(self.tab_control)
-        self.favorites_tab = ttk.Frame(self.tab_control)
-        self.tab_control.add(self.info_tab, text='Info')
-        self.tab_control.add(self.evolution_tab, text='Evolution')
-        self.tab_control.add(self.moves_tab, text='Moves')
-        self.tab_control.add(self.team_tab, text='Team Builder')
-        self.tab_control.add(self.favorites_tab, text='Favorites')
-        self.tab_control.pack(expand=1, fill='both')
-
-        self.create_info_tab()
-        self.create_evolution_tab()
-        self.create_moves_tab()
-        self.create_team_tab()
-        self.create_favorites_tab()
-
     def create_info_tab(self):
         self.name_label = tk.Label(self.info_tab, text="", font=('Arial', 22))
         self.name_label.pack()
@@ -248,10 +303,146 @@ class PokedexApp:
         self.evolution_inner_frame = tk.Frame(self.evolution_tab)
         self.evolution_inner_frame.pack(fill=tk.BOTH, expand=True)
 
+        # Built once and reused by every search
+        self.evolution_canvas = tk.Canvas(self.evolution_inner_frame)
+        self.evolution_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar = ttk.Scrollbar(self.evolution_inner_frame, orient="vertical", command=self.evolution_canvas.yview)
+        scrollbar.pack(side=tk.RIGHT, fill="y")
+        self.evolution_canvas.configure(yscrollcommand=scrollbar.set)
+        self.evolution_frame = tk.Frame(self.evolution_canvas, bg='#34495E')
+        self.evolution_canvas.create_window((0, 0), window=self.evolution_frame, anchor="nw")
+
+        # One (frame, name, sprite, method) group per stage, grown as longer
+        # chains come along; stages a chain doesn't use are just hidden
+        self.evolution_stage_widgets = []
+        self.visible_evolution_stages = 0
+
+    def create_evolution_stage(self):
+        frame = tk.Frame(self.evolution_frame, bg='#34495E')
+        name_label = tk.Label(frame, text="", font=('Arial', 14), bg='#34495E', fg='white')
+        name_label.pack(side=tk.TOP, padx=5, pady=5)
+        sprite_label = tk.Label(frame, bg='#34495E')
+        sprite_label.pack(side=tk.RIGHT)
+        method_label = tk.Label(frame, text="", font=('Arial', 10), bg='#34495E', fg='white')
+        method_label.pack(side=tk.TOP, padx=5, pady=5)
+        return frame, name_label, sprite_label, method_label
+
     def create_moves_tab(self):
         self.moves_inner_frame = tk.Frame(self.moves_tab)
         self.moves_inner_frame.pack(fill=tk.BOTH, expand=True)
 
+        moves_label = tk.Label(self.moves_inner_frame, text="Moves:", font=('Arial', 14, 'bold'), bg='#34495E', fg='white')
+        moves_label.pack(pady=(10, 0))
+
+        # Sort and filter controls, they work on the in-memory move index
+        controls = tk.Frame(self.moves_inner_frame)
+        controls.pack(fill=tk.X, padx=10, pady=5)
+        self.moves_sort = tk.StringVar(value='name')
+        self.moves_class_filter = tk.StringVar(value='all')
+        self.moves_type_filter = tk.StringVar(value='all')
+        tk.Label(controls, text="Sort by:").pack(side=tk.LEFT)
+        ttk.Combobox(controls, textvariable=self.moves_sort, values=list(MOVE_SORT_KEYS), state='readonly', width=12).pack(side=tk.LEFT, padx=5)
+        tk.Label(controls, text="Class:").pack(side=tk.LEFT)
+        ttk.Combobox(controls, textvariable=self.moves_class_filter, values=['all', 'physical', 'special', 'status'], state='readonly', width=10).pack(side=tk.LEFT, padx=5)
+        tk.Label(controls, text="Type:").pack(side=tk.LEFT)
+        self.moves_type_box = ttk.Combobox(controls, textvariable=self.moves_type_filter, values=['all'], state='readonly', width=10)
+        self.moves_type_box.pack(side=tk.LEFT, padx=5)
+        for variable in (self.moves_sort, self.moves_class_filter, self.moves_type_filter):
+            variable.trace_add('write', lambda *args: self.display_move_details())
+
+        # A single Listbox only draws the rows on screen, so a full move list
+        # of 100+ entries costs no more than 15 did
+        moves_scrollbar = ttk.Scrollbar(self.moves_inner_frame, orient="vertical")
+        moves_scrollbar.pack(side=tk.RIGHT, fill="y")
+        self.moves_listbox = tk.Listbox(self.moves_inner_frame, font=('Courier', 11), bg='#34495E', fg='#FFFFFF',
+                                        activestyle='none', highlightthickness=0, yscrollcommand=moves_scrollbar.set)
+        self.moves_listbox.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        moves_scrollbar.config(command=self.moves_listbox.yview)
+
+    def create_browse_tab(self):
+        # Every cached Pokémon, filtered and sorted through the stats table
+        controls = tk.Frame(self.browse_tab)
+        controls.pack(fill=tk.X, padx=10, pady=5)
+        self.browse_type = tk.StringVar(value='all')
+        self.browse_generation = tk.StringVar(value='all')
+        self.browse_stat = tk.StringVar(value='speed')
+        self.browse_min = tk.StringVar(value='0')
+        self.browse_sort = tk.StringVar(value='id')
+        self.browse_descending = tk.BooleanVar(value=False)
+        tk.Label(controls, text="Type:").pack(side=tk.LEFT)
+        ttk.Combobox(controls, textvariable=self.browse_type, values=['all'] + TYPES, state='readonly', width=9).pack(side=tk.LEFT, padx=5)
+        tk.Label(controls, text="Gen:").pack(side=tk.LEFT)
+        ttk.Combobox(controls, textvariable=self.browse_generation, values=['all'] + [str(n) for n in range(1, 10)], state='readonly', width=4).pack(side=tk.LEFT, padx=5)
+        ttk.Combobox(controls, textvariable=self.browse_stat, values=STAT_NAMES + ['total'], state='readonly', width=14).pack(side=tk.LEFT, padx=5)
+        tk.Label(controls, text=">=").pack(side=tk.LEFT)
+        tk.Spinbox(controls, textvariable=self.browse_min, from_=0, to=800, increment=10, width=5).pack(side=tk.LEFT, padx=5)
+        tk.Label(controls, text="Sort:").pack(side=tk.LEFT)
+        ttk.Combobox(controls, textvariable=self.browse_sort, values=list(BROWSE_SORT_KEYS), state='readonly', width=14).pack(side=tk.LEFT, padx=5)
+        tk.Checkbutton(controls, text="Desc", variable=self.browse_descending).pack(side=tk.LEFT)
+        for variable in (self.browse_type, self.browse_generation, self.browse_stat, self.browse_min, self.browse_sort, self.browse_descending):
+            variable.trace_add('write', lambda *args: self.display_browse())
+
+        self.browse_status = tk.Label(self.browse_tab, text="", anchor='w')
+        self.browse_status.pack(fill=tk.X, padx=10)
+        browse_scrollbar = ttk.Scrollbar(self.browse_tab, orient="vertical")
+        browse_scrollbar.pack(side=tk.RIGHT, fill="y")
+        self.browse_listbox = tk.Listbox(self.browse_tab, font=('Courier', 11), activestyle='none', yscrollcommand=browse_scrollbar.set)
+        self.browse_listbox.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        browse_scrollbar.config(command=self.browse_listbox.yview)
+        self.browse_listbox.bind("<Double-1>", self.select_from_browse)
+
+    def load_stats_table(self):
+        if self.browse_loading:
+            return
+        self.browse_loading = True
+        def done(table):
+            self.browse_loading = False
+            self.stats_table = table
+            self.display_browse()
+        def failed(error):
+            self.browse_loading = False
+            self.browse_status.config(text=f"Couldn't load the Pokédex table: {error}")
+        if self.stats_table is None:
+            self.browse_status.config(text="Loading...")
+        self.executor.submit(fetch_stats_table, on_done=done, on_error=failed)
+
+    def display_browse(self):
+        if self.stats_table is None:
+            return
+        table = self.stats_table
+        try:
+            minimum = int(self.browse_min.get() or 0)
+        except ValueError:
+            return  # Still typing
+        pokemon_type = self.browse_type.get()
+        generation = self.browse_generation.get()
+        rows = table.query(
+            types=() if pokemon_type == 'all' else (pokemon_type,),
+            generation=None if generation == 'all' else int(generation),
+            minimum={self.browse_stat.get(): minimum} if minimum > 0 else None,
+            sort_by=self.browse_sort.get(),
+            descending=self.browse_descending.get(),
+        )
+        self.browse_rows = [table['name'][row].decode('utf-8') for row in rows]
+        lines = []
+        for row in rows:
+            data = table.row(row)
+            stats = " ".join(f"{data[stat]:>3}" if data[stat] >= 0 else "  ?" for stat in STAT_NAMES)
+            lines.append(f"#{data['id']:<5} {data['name'].capitalize():<16} {'/'.join(data['types']):<17} {stats}  "
+                         f"{data['weight']:>6.1f}kg {data['height']:>4.1f}m")
+        self.browse_listbox.delete(0, tk.END)
+        self.browse_listbox.insert(tk.END, *lines)
+        self.browse_listbox.yview_moveto(0)
+        self.browse_status.config(text=f"{len(rows)} of {len(table)} cached Pokémon   (HP Atk Def SpA SpD Spe)")
+
+    def select_from_browse(self, event=None):
+        selection = self.browse_listbox.curselection()
+        if not selection:
+            return
+        self.entry.delete(0, tk.END)
+        self.entry.insert(0, self.browse_rows[selection[0]])
+        self.search_pokemon()
+
     def create_team_tab(self):
         team_frame = tk.Frame(self.team_tab)
         team_frame.pack(fill=tk.BOTH, expand=True)
@@ -259,6 +450,15 @@ class PokedexApp:
         self.team_listbox = tk.Listbox(team_frame, font=('Arial', 14), height=15)
         self.team_listbox.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
+        self.team_analysis_label = tk.Label(team_frame, text="", font=('Arial', 11), justify=tk.LEFT, anchor='w', wraplength=700)
+        self.team_analysis_label.pack(fill=tk.X, padx=10)
+
+        tk.Label(team_frame, text="Suggested next member (double-click to view):", font=('Arial', 11, 'bold'), anchor='w').pack(fill=tk.X, padx=10, pady=(10, 0))
+        self.recommend_listbox = tk.Listbox(team_frame, font=('Arial', 12), height=5)
+        self.recommend_listbox.pack(fill=tk.X, padx=10, pady=5)
+        self.recommend_listbox.bind("<Double-1>", self.select_recommendation)
+        self.recommendations = []
+
         self.clear_team_button = tk.Button(self.team_tab, text="Clear Team", command=self.clear_team)
         self.clear_team_button.pack(pady=10)
 
@@ -273,23 +473,195 @@ class PokedexApp:
         self.clear_favorites_button.pack(pady=10)
         
     def search_pokemon(self):
-        # Cancel ongoing animation
-        if self.animation_job:
-            self.root.after_cancel(self.animation_job)
+        self.stop_animation()
 
-        pokemon_name = self.entry.get()
-        data = fetch_pokemon_data(pokemon_name)
+        query = self.entry.get().lower().strip()
 
-        if data:
-            self.display_pokemon(data)
-            evolution_data = fetch_evolution_data(data['species_url'])
-            if evolution_data:
-                self.display_evolution_line(evolution_data['chain'])
+        # Avoid searching empty strings
+        if query == "":
+            return
+
+        pokemon_name, dex_number = self.resolve_query(query)
+        self.history_listbox.pack_forget()
+
+        # A new search supersedes whatever the previous one still has queued
+        self.finish_trace()
+        self.trace = perf.start_trace(pokemon_name)
+        self.search_generation = self.executor.new_generation()
+        self.search_name = pokemon_name
+        self.loading = set()
+        self.deferred_tasks = []
+        self.pending_moveset = None
+        self.pending_renders.clear()
+        self.start_task('pokemon', load_pokemon, pokemon_name, dex_number,
+                        on_done=lambda data: self.on_pokemon_loaded(pokemon_name, data),
+                        on_error=lambda e: messagebox.showerror("Error", f"Failed to load '{pokemon_name}': {e}"))
+
+    def start_task(self, task, fn, *args, on_done, on_error=None):
+        # Runs fn in the background for the current search and keeps the
+        # loading label in sync with what is still outstanding
+        def finished(result):
+            self.loading.discard(task)
+            self.update_status()
+            with perf.span(f'display.{task}'):
+                on_done(result)
+            self.measure_layout()
+            self.start_deferred_tasks()
+            if not self.loading:
+                self.finish_trace()
+
+        def failed(error):
+            self.loading.discard(task)
+            self.update_status()
+            if on_error:
+                on_error(error)
             else:
-                messagebox.showwarning("Warning", "No evolution data found.")
-            self.display_moves(data['moves'])
+                print(f"Failed to load {task}: {error}")
+            self.start_deferred_tasks()
+            if not self.loading:
+                self.finish_trace()
+
+        self.loading.add(task)
+        self.update_status()
+        self.executor.submit(run_timed, f'task.{task}', fn, *args, on_done=finished, on_error=failed, generation=self.search_generation)
+
+    def measure_layout(self):
+        # Tk lays widgets out when it's next idle; when profiling do it now,
+        # so the layout time shows up next to the stage that caused it
+        if perf.ENABLED:
+            with perf.span('tk.layout'):
+                self.root.update_idletasks()
+
+    def finish_trace(self):
+        if self.trace is None:
+            return
+        perf.finish_trace(self.trace)
+        self.trace = None
+        self.refresh_debug_panel()
+
+    def update_status(self):
+        if self.loading:
+            self.status_label.config(text=f"Loading {self.search_name.capitalize()}: {', '.join(sorted(self.loading))}...")
         else:
+            self.status_label.config(text="")
+
+    def toggle_debug_panel(self, event=None):
+        # F12: per-stage timings of the last searches. Turns perf on if it
+        # wasn't, so the next search is measured.
+        if self.debug_window is not None:
+            self.debug_window.destroy()
+            self.debug_window = None
+            return
+        if not perf.ENABLED:
+            perf.enable()
+        self.debug_window = tk.Toplevel(self.root)
+        self.debug_window.title("Performance")
+        self.debug_window.geometry("520x600")
+        self.debug_window.protocol("WM_DELETE_WINDOW", self.toggle_debug_panel)
+        self.debug_text = tk.Text(self.debug_window, font=('Courier', 10), wrap='none')
+        self.debug_text.pack(fill=tk.BOTH, expand=True)
+        self.refresh_debug_panel()
+
+    def refresh_debug_panel(self):
+        if self.debug_window is None:
+            return
+        lines = []
+        for trace in reversed(perf.recent):
+            lines.append(f"{trace.label.capitalize():<24} {trace.total_ms():9.1f} ms")
+            for name, (calls, total) in trace.breakdown().items():
+                lines.append(f"  {name:<28} {calls:>3}x {total:9.1f} ms")
+            if trace.counters:
+                lines.append("  " + ", ".join(f"{name}={value}" for name, value in sorted(trace.counters.items())))
+            lines.append("")
+        if not lines:
+            lines.append("Search for a Pokémon to see where the time goes.")
+        self.debug_text.delete('1.0', tk.END)
+        self.debug_text.insert(tk.END, "\n".join(lines))
+
+    def on_pokemon_loaded(self, pokemon_name, data):
+        if not data:
             messagebox.showerror("Error", f"Pokémon '{pokemon_name}' not found.")
+            return
+
+        # Update search history
+        if pokemon_name not in self.search_history:
+            self.search_history.insert(0, pokemon_name)
+            if len(self.search_history) > self.max_history:
+                self.search_history.pop()  # Remove oldest history if exceeding max limit
+            self.save_user_data()
+
+        # Hide search history after selection
+        self.history_listbox.pack_forget()
+
+        # The Info tab comes first: labels now, lore and sprite as they arrive
+        self.display_pokemon(data)
+        self.start_task('lore', fetch_species_data, data['species_url'], on_done=self.display_lore)
+        sprites = data['sprites']
+        if sprites.get('animated'):
+            self.start_task('sprite', load_animation, sprites['animated'], on_done=self.display_animation, on_error=self.on_image_error)
+        elif sprites.get('front_default'):
+            self.start_task('sprite', load_static_image, sprites['front_default'], on_done=self.display_image, on_error=self.on_image_error)
+
+        # The other tabs are only filled in once they are looked at. The
+        # evolution chain waits until Info has what it needs, unless the
+        # Evolution tab is opened first.
+        self.render_when_visible(self.moves_tab, lambda: self.display_moves(data['moves']))
+        self.deferred_tasks = [('evolution', load_evolution, data['species_url'], self.on_evolution_loaded)]
+        # Move details can be hundreds of requests for a new Pokémon, so they
+        # are only fetched if the Moves tab is actually opened
+        self.pending_moveset = data['moves']
+        if self.tab_control.select() == str(self.moves_tab):
+            self.start_moveset_task()
+        if self.tab_control.select() in (str(self.evolution_tab), str(self.moves_tab)):
+            self.start_deferred_tasks(force=True)
+        else:
+            self.start_deferred_tasks()
+
+        # Whatever is likely to be searched next, fetched once things are quiet
+        self.prefetcher.after_search(data)
+        if self.prefetch_job is None and not self.prefetch_running:
+            self.schedule_prefetch()
+
+    def start_deferred_tasks(self, force=False):
+        # Low priority work for the hidden tabs starts once the Info tab's
+        # tasks are done, so it never competes with them for the network
+        if not self.deferred_tasks or (not force and self.loading & {'pokemon', 'lore', 'sprite'}):
+            return
+        deferred_tasks, self.deferred_tasks = self.deferred_tasks, []
+        for task, fn, arg, on_done in deferred_tasks:
+            self.start_task(task, fn, arg, on_done=on_done)
+
+    def start_moveset_task(self):
+        # Stops between batches of downloads once a newer search has started,
+        # so it doesn't hold a worker the next search needs
+        if self.pending_moveset is None:
+            return
+        moves, self.pending_moveset = self.pending_moveset, None
+        generation = self.search_generation
+        self.start_task('moves', fetch_moveset, moves, lambda: not self.executor.is_current(generation),
+                        on_done=self.on_moveset_loaded)
+
+    def render_when_visible(self, tab, render):
+        # Renders now if tab is on screen, otherwise the first time it is shown
+        def timed_render():
+            with perf.span(f"render.{self.tab_control.tab(tab, 'text').lower()}"):
+                render()
+            self.measure_layout()
+        if self.tab_control.select() == str(tab):
+            self.pending_renders.pop(str(tab), None)
+            timed_render()
+        else:
+            self.pending_renders[str(tab)] = timed_render
+
+    def on_evolution_loaded(self, result):
+        if result:
+            chain, stages = result
+            self.render_when_visible(self.evolution_tab, lambda: self.display_evolution_line(chain, stages))
+        else:
+            def render():
+                self.hide_evolution_stages(0)
+                messagebox.showwarning("Warning", "No evolution data found.")
+            self.render_when_visible(self.evolution_tab, render)
 
     def display_pokemon(self, data):
         self.current_data = data
@@ -297,92 +669,81 @@ class PokedexApp:
         self.type_label.config(text=f"Type: {', '.join(data['types']).capitalize()}")
         self.weight_label.config(text=f"Weight: {data['weight']} kg")
         self.height_label.config(text=f"Height: {data['height']} m")
-        species_data = fetch_species_data(data['species_url'])
+        self.lore_label.config(text="")
+        self.image_label.config(image='')
+
+    def display_lore(self, species_data):
         if species_data:
-            self.lore_label.config(text=species_data.get('flavor_text_entries', [{}])[0].get('flavor_text', '').replace('\n', ' '))
-        self.display_image(data['sprites']['front_default'], animated_url=data['sprites'].get('versions', {}).get('generation-v', {}).get('black-white', {}).get('animated', {}).get('front_default'))
+            self.lore_label.config(text=species_data.get('flavor_text', ''))
+
+    def display_image(self, image):
+        self.photo = ImageTk.PhotoImage(image)
+        self.image_label.config(image=self.photo)
+        self.image_label.image = self.photo
+
+    def display_animation(self, result):
+        # PhotoImages have to be made on the Tk thread, but only once per sprite
+        url, frames = result
+        if url in self.animation_cache:
+            self.animation_cache.move_to_end(url)
+        else:
+            self.animation_cache[url] = [(ImageTk.PhotoImage(image), duration) for image, duration in frames]
+            if len(self.animation_cache) > self.max_cached_animations:
+                self.animation_cache.popitem(last=False)
+        self.animation_frames = self.animation_cache[url]
+        self.animation_index = 0
+        self.animate_sprite()
 
-    def display_image(self, image_url, animated_url=None):
-        try:
-            if animated_url:  # Display animated sprite
-                response = requests.get(animated_url)
-                response.raise_for_status()
-                img_data = io.BytesIO(response.content)
-                self.animation_frames = Image.open(img_data)
-                self.animation_index = 0
-                self.animate_sprite()
-            else:
-                # Display static image
-                response = requests.get(image_url)
-                response.raise_for_status()
-                img_data = response.content
-                image = Image.open(io.BytesIO(img_data))
-                image = image.resize((150, 150), Image.LANCZOS)
-                self.photo = ImageTk.PhotoImage(image)
-                self.image_label.config(image=self.photo)
-                self.image_label.image = self.photo
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load image: {e}")
+    def on_image_error(self, error):
+        messagebox.showerror("Error", f"Failed to load image: {error}")
+
+    def stop_animation(self):
+        # Cancel ongoing animation
+        if self.animation_job:
+            self.root.after_cancel(self.animation_job)
+            self.animation_job = None
+        self.animation_frames = None
 
     def animate_sprite(self):
-        if self.animation_frames:
-            try:
-                frame = ImageTk.PhotoImage(self.animation_frames.copy().convert('RGBA'))
-                self.photo = frame
-                self.image_label.config(image=self.photo)
-                self.image_label.image = self.photo
-                self.animation_index = (self.animation_index + 1) % self.animation_frames.n_frames
-                self.animation_frames.seek(self.animation_index)
-                self.animation_job = self.root.after(100, self.animate_sprite)
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to animate sprite: {e}")
-
-
-    def display_evolution_line(self, chain):
-        # Clear previous widgets
-        for widget in self.evolution_inner_frame.winfo_children():
-            widget.destroy()
+        self.animation_job = None
+        # Nothing to draw while the Info tab is hidden, on_tab_changed resumes it
+        if not self.animation_frames or self.tab_control.select() != str(self.info_tab):
+            return
+        photo, duration = self.animation_frames[self.animation_index]
+        self.image_label.config(image=photo)
+        self.image_label.image = photo
+        self.animation_index = (self.animation_index + 1) % len(self.animation_frames)
+        self.animation_job = self.root.after(duration, self.animate_sprite)
+
+    def on_tab_changed(self, event=None):
+        selected = self.tab_control.select()
+        render = self.pending_renders.pop(selected, None)
+        if render:
+            render()
+        if selected in (str(self.evolution_tab), str(self.moves_tab)):
+            self.start_deferred_tasks(force=True)
+        if selected == str(self.moves_tab):
+            self.start_moveset_task()
+        if selected == str(self.browse_tab):
+            self.load_stats_table()  # Picks up Pokémon cached since it was last opened
+
+        if selected == str(self.info_tab):
+            if self.animation_frames and not self.animation_job:
+                self.animate_sprite()
+        elif self.animation_job:
+            self.root.after_cancel(self.animation_job)
+            self.animation_job = None
 
+    def display_evolution_line(self, chain, stages):
         # List to store the evolution details
         evolution_steps = []
 
-        # Create a canvas and a scrollbar for the evolution details
-        canvas = tk.Canvas(self.evolution_inner_frame)
-        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-
-        scrollbar = ttk.Scrollbar(self.evolution_inner_frame, orient="vertical", command=canvas.yview)
-        scrollbar.pack(side=tk.RIGHT, fill="y")
-
-        canvas.configure(yscrollcommand=scrollbar.set)
-
-        # Create a frame inside the canvas to hold the evolution details
-        evolution_frame = tk.Frame(canvas, bg='#34495E')
-        canvas.create_window((0, 0), window=evolution_frame, anchor="nw")
-
         def display_recursive(chain):
             species_name = chain['species']['name']
-            evolution_data = fetch_pokemon_data(species_name)
+            evolution_data, sprite_image = stages.get(species_name, (None, None))
 
             if evolution_data:
-                frame = tk.Frame(evolution_frame, bg='#34495E')
-                frame.pack(pady=10, fill=tk.BOTH)
-
-                label = tk.Label(frame, text=species_name.capitalize(), font=('Arial', 14), bg='#34495E', fg='white')
-                label.pack(side=tk.TOP, padx=5, pady=5)
-
-                try:
-                    # Attempt to fetch sprite
-                    sprite_url = evolution_data['sprites']['front_default']
-                    img_response = requests.get(sprite_url)
-                    img_response.raise_for_status()
-                    img_data = io.BytesIO(img_response.content)
-                    img = Image.open(img_data).resize((150, 150), Image.LANCZOS)
-                    sprite = ImageTk.PhotoImage(img)
-                    sprite_label = tk.Label(frame, image=sprite, bg='#34495E')
-                    sprite_label.image = sprite
-                    sprite_label.pack(side=tk.RIGHT)
-                except Exception as e:
-                    print(f"Failed to load evolution sprite: {e}")
+                sprite_url = evolution_data['sprites']['front_default']
 
                 # Handle evolution details
                 evolution_details = chain.get('evolution_details', [])
@@ -409,45 +770,95 @@ class PokedexApp:
                             evolution_method = 'Unknown Evolution Method'
                     else:
                         evolution_method = 'No Evolution Method Available'
-                        evolution_item = None
                 else:
                     evolution_method = 'No Evolution Method Available'
-                    evolution_item = None
 
-                method_label = tk.Label(frame, text=f"Evolution Method: {evolution_method}", font=('Arial', 10), bg='#34495E', fg='white')
-                method_label.pack(side=tk.TOP, padx=5, pady=5)
+                self.show_evolution_stage(len(evolution_steps), species_name, sprite_image, evolution_method)
 
                 # Store the evolution details in the list
                 evolution_steps.append({
                     'species': species_name.capitalize(),
                     'method': evolution_method,
-                    'sprite_url': sprite_url if 'sprite_url' in locals() else None
+                    'sprite_url': sprite_url
                 })
 
             # Recursively process each 'evolves_to' entry
-            if 'evolves_to' in chain:
-                for next_evolution in chain.get('evolves_to', []):
-                    display_recursive(next_evolution)
+            for next_evolution in chain.get('evolves_to', []):
+                display_recursive(next_evolution)
 
         # Start the recursion
         display_recursive(chain)
 
+        # Hide the stages left over from a longer chain
+        self.hide_evolution_stages(len(evolution_steps))
+        self.visible_evolution_stages = len(evolution_steps)
+
         # Update the scroll region of the canvas to include all the children of the evolution_frame
-        evolution_frame.update_idletasks()
-        canvas.config(scrollregion=canvas.bbox("all"))
+        self.evolution_frame.update_idletasks()
+        self.evolution_canvas.config(scrollregion=self.evolution_canvas.bbox("all"))
 
         # Return the evolution steps
         return evolution_steps
 
+    def hide_evolution_stages(self, first_hidden):
+        for frame, _, sprite_label, _ in self.evolution_stage_widgets[first_hidden:self.visible_evolution_stages]:
+            frame.pack_forget()
+            sprite_label.config(image='')
+            sprite_label.image = None
+        self.visible_evolution_stages = min(self.visible_evolution_stages, first_hidden)
+
+    def show_evolution_stage(self, position, species_name, sprite_image, evolution_method):
+        # Fills in the pooled widgets for one stage, creating them the first
+        # time a chain is this long
+        if position == len(self.evolution_stage_widgets):
+            self.evolution_stage_widgets.append(self.create_evolution_stage())
+        frame, name_label, sprite_label, method_label = self.evolution_stage_widgets[position]
+        name_label.config(text=species_name.capitalize())
+        method_label.config(text=f"Evolution Method: {evolution_method}")
+        # Replacing the reference lets the previous search's PhotoImage go
+        sprite = ImageTk.PhotoImage(sprite_image) if sprite_image else None
+        sprite_label.config(image=sprite or '')
+        sprite_label.image = sprite
+        if position >= self.visible_evolution_stages:
+            frame.pack(pady=10, fill=tk.BOTH)
+
     def display_moves(self, moves):
-        for widget in self.moves_inner_frame.winfo_children():
-            widget.destroy()
-        moves_label = tk.Label(self.moves_inner_frame, text="Moves:", font=('Arial', 14, 'bold'), bg='#34495E', fg='white')
-        moves_label.pack(pady=(10, 0))
-        competitive_moves = ["stealth-rock", "earthquake", "recover", "toxic", "spikes", "calm-mind", "defog"]  # Example competitive moves
-        for move in moves[:15]:  # Show first 15 moves
-            move_label = tk.Label(self.moves_inner_frame, text=move.capitalize() + (" (Competitive)" if move in competitive_moves else ""), bg='#34495E', fg='#FFFFFF')
-            move_label.pack(anchor='w', padx=10, pady=2)
+        # Names only, shown until the move details have been fetched
+        self.move_index = None
+        self.moves_type_box.config(values=['all'])
+        self.moves_listbox.delete(0, tk.END)
+        self.moves_listbox.insert(tk.END, *[move.capitalize() + (" (Competitive)" if move in COMPETITIVE_MOVES else "") for move in moves])
+        self.moves_listbox.yview_moveto(0)
+
+    def on_moveset_loaded(self, move_index):
+        def render():
+            self.move_index = move_index
+            self.moves_type_box.config(values=['all'] + move_index.types())
+            self.display_move_details()
+        self.render_when_visible(self.moves_tab, render)
+
+    def display_move_details(self):
+        if self.move_index is None:
+            return
+        move_type = self.moves_type_filter.get()
+        damage_class = self.moves_class_filter.get()
+        sort_by = self.moves_sort.get()
+        moves = self.move_index.query(
+            move_type=None if move_type == 'all' else move_type,
+            damage_class=None if damage_class == 'all' else damage_class,
+            sort_by=sort_by,
+            descending=sort_by in ('power', 'accuracy', 'pp', 'priority'),
+        )
+        rows = []
+        for move in moves:
+            power = move['power'] if move['power'] is not None else '-'
+            accuracy = f"{move['accuracy']}%" if move['accuracy'] is not None else '-'
+            competitive = " (Competitive)" if move['name'] in COMPETITIVE_MOVES else ""
+            rows.append(f"{move['name'].replace('-', ' ').title():<20} {move['type'] or '?':<9} {move['damage_class'] or '?':<9} "
+                        f"Pow {power:<4} Acc {accuracy:<5} PP {move['pp']}{competitive}")
+        self.moves_listbox.delete(0, tk.END)
+        self.moves_listbox.insert(tk.END, *rows)
+        self.moves_listbox.yview_moveto(0)
 
     from tkinter import messagebox
 
@@ -473,6 +884,46 @@ class PokedexApp:
         self.team_listbox.delete(0, tk.END)
         for member in self.team:
             self.team_listbox.insert(tk.END, member.capitalize())
+        self.save_user_data()
+        self.analyze_team()
+
+    def analyze_team(self):
+        team = list(self.team)
+        self.team_analysis_label.config(text="Analyzing team..." if team else "")
+        self.recommend_listbox.delete(0, tk.END)
+        self.recommendations = []
+        if not team:
+            return
+        self.executor.submit(load_team_analysis, team,
+                             on_done=lambda result: self.display_team_analysis(team, *result),
+                             on_error=lambda e: self.team_analysis_label.config(text=f"Team analysis failed: {e}"))
+
+    def display_team_analysis(self, team, analysis, recommendations):
+        if team != self.team:
+            return  # The team changed while this was running
+        def describe(counts):
+            return ", ".join(f"{name.capitalize()} x{count}" for name, count in sorted(counts.items(), key=lambda item: -item[1])) or "None"
+        lines = [
+            f"Hits super effectively: {', '.join(name.capitalize() for name in analysis['coverage']) or 'Nothing'}",
+            f"No super effective coverage: {', '.join(name.capitalize() for name in analysis['uncovered']) or 'None'}",
+            f"Weak to: {describe(analysis['weaknesses'])}",
+            f"Resists: {describe(analysis['resistances'])}",
+            f"Shared weaknesses: {', '.join(name.capitalize() for name in analysis['shared_weaknesses']) or 'None'}",
+        ]
+        self.team_analysis_label.config(text="\n".join(lines))
+        self.recommendations = [name for name, _ in recommendations]
+        for name, score in recommendations:
+            self.recommend_listbox.insert(tk.END, f"{name.capitalize()} (score {score:+.1f})")
+        if len(team) < 6 and not recommendations:
+            self.recommend_listbox.insert(tk.END, "Search for more Pokémon to get suggestions")
+
+    def select_recommendation(self, event=None):
+        selection = self.recommend_listbox.curselection()
+        if not selection or selection[0] >= len(self.recommendations):
+            return
+        self.entry.delete(0, tk.END)
+        self.entry.insert(0, self.recommendations[selection[0]])
+        self.search_pokemon()
 
     def add_to_favorites(self):
         if self.current_data is None:
@@ -500,6 +951,7 @@ class PokedexApp:
         self.favorites_listbox.delete(0, tk.END)
         for fav in self.favorites:
             self.favorites_listbox.insert(tk.END, fav.capitalize())
+        self.save_user_data()
 
 if __name__ == "__main__":
     root = tk.Tk()
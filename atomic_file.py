@@ -0,0 +1,30 @@
+import os
+import threading
+
+# Every file the app writes is written to a temporary file next to it and
+# renamed into place, so readers and a crash part way never see half a file.
+# The temporary name is unique to the process and thread, so two writers at
+# once (two app windows, warm next to the app) never share one.
+
+
+def temp_path_for(path):
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def atomic_write(path, write, mode='w', sync=False):
+    # write(file) fills the temporary file. sync also flushes it to disk
+    # before the rename, for files that must survive a power cut.
+    temp_path = temp_path_for(path)
+    try:
+        with open(temp_path, mode) as temp_file:
+            write(temp_file)
+            if sync:
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,68 @@
+import contextvars
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+
+class UiExecutor:
+    # Runs blocking work (network, image decoding) on a thread pool and hands
+    # the results back to Tk. Tk isn't thread safe, so workers never touch
+    # widgets: finished futures are queued and the main loop drains the queue
+    # with root.after, calling on_done/on_error there.
+    def __init__(self, root, max_workers=4, poll_ms=20):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pokedex')
+        self.finished = queue.SimpleQueue()
+        self.generation = 0
+        self.pending = []
+        self.closed = False
+        self.poll_job = self.root.after(self.poll_ms, self._drain)
+
+    def new_generation(self):
+        # Starts a new batch of work, e.g. for a new search. Anything still
+        # queued for older batches is cancelled and their callbacks dropped.
+        self.generation += 1
+        for future in self.pending:
+            future.cancel()
+        self.pending = []
+        return self.generation
+
+    def is_current(self, generation):
+        # False for everything once shut down, so long running work that
+        # checks it (e.g. fetch_moveset's cancelled) stops instead of holding
+        # up the exit
+        return not self.closed and (generation is None or generation == self.generation)
+
+    def submit(self, fn, *args, on_done=None, on_error=None, generation=None):
+        # Runs in a copy of the caller's context, so context variables (e.g.
+        # the perf trace of the current search) follow the work
+        future = self.pool.submit(contextvars.copy_context().run, fn, *args)
+        if generation is not None:
+            self.pending = [f for f in self.pending if not f.done()]
+            self.pending.append(future)
+        future.add_done_callback(lambda f: self.finished.put((f, on_done, on_error, generation)))
+        return future
+
+    def _drain(self):
+        while True:
+            try:
+                future, on_done, on_error, generation = self.finished.get_nowait()
+            except queue.Empty:
+                break
+            if future.cancelled() or not self.is_current(generation):
+                continue
+            error = future.exception()
+            if error is not None:
+                if on_error:
+                    on_error(error)
+                else:
+                    print(f"Background task failed: {error}")
+            elif on_done:
+                on_done(future.result())
+        self.poll_job = self.root.after(self.poll_ms, self._drain)
+
+    def shutdown(self):
+        self.closed = True
+        self.new_generation()
+        self.root.after_cancel(self.poll_job)
+        self.pool.shutdown(wait=False, cancel_futures=True)
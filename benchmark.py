@@ -0,0 +1,424 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+from PIL import Image
+from stats_store import stats_table_versions
+
+# Repeatable timings for the fetch/cache paths and the Tk rendering, run
+# against a local stub server that replays the responses recorded in
+# pokemon_cache.json, so results don't depend on pokeapi.co or the network.
+#   python benchmark.py run --output before.json
+#   ... change something ...
+#   python benchmark.py run --output after.json
+#   python benchmark.py compare before.json after.json
+# Everything runs in a scratch directory; the real cache is never touched.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_CACHE = os.path.join(HERE, "pokemon_cache.json")
+RECORDED_API = "https://pokeapi.co/api/v2/"
+RECORDED_SPRITES = "https://raw.githubusercontent.com/"
+RESULTS_VERSION = 1
+
+
+def _placeholder_sprite(path):
+    # Stand-in for a sprite that was never downloaded: a 96x96 PNG, or a
+    # 4-frame GIF for the animated ones
+    buffer = io.BytesIO()
+    if path.endswith('.gif'):
+        frames = [Image.new('RGB', (96, 96), (60 * i, 80, 160)) for i in range(4)]
+        frames[0].save(buffer, 'GIF', save_all=True, append_images=frames[1:], duration=100, loop=0)
+    else:
+        Image.new('RGBA', (96, 96), (200, 60, 60, 255)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class Fixtures:
+    # The recorded cache turned back into API responses. Entries are the
+    # original projections (Pokémon) and raw payloads (species, chains).
+    def __init__(self, cache_path=FIXTURE_CACHE):
+        with open(cache_path, 'r') as cache_file:
+            recorded = json.load(cache_file)
+        self.pokemon = {}
+        self.species = {}
+        self.chains = {}
+        for key, value in recorded.items():
+            if key.startswith(RECORDED_API + "pokemon-species/"):
+                self.species[value['id']] = value
+            elif key.startswith(RECORDED_API + "evolution-chain/"):
+                self.chains[value['id']] = value
+            elif '/' not in key:
+                self.pokemon[value['name']] = value
+        self.species_urls = [RECORDED_API + f"pokemon-species/{species_id}/" for species_id in sorted(self.species)]
+
+    def routes(self, base_url):
+        # path -> (body, content type), with every recorded URL pointing at base_url
+        def rewrite(data):
+            text = json.dumps(data)
+            text = text.replace(RECORDED_API, base_url + "api/v2/").replace(RECORDED_SPRITES, base_url + "sprites/")
+            return text.encode('utf-8')
+
+        species_ids = {species['name']: species_id for species_id, species in self.species.items()}
+        routes = {}
+        sprite_urls = []
+        for name, data in self.pokemon.items():
+            species_id = int(data['species_url'].rstrip('/').rsplit('/', 1)[1])
+            response = {
+                'id': species_ids.get(name, species_id),
+                'name': name,
+                'weight': round(data['weight'] * 10),
+                'height': round(data['height'] * 10),
+                'types': [{'slot': i + 1, 'type': {'name': t}} for i, t in enumerate(data['types'])],
+                'moves': [{'move': {'name': move}} for move in data['moves']],
+                'species': {'name': name, 'url': data['species_url']},
+                'sprites': data['sprites'],
+                'stats': [],
+            }
+            body = rewrite(response)
+            routes[f"/api/v2/pokemon/{name}"] = (body, 'application/json')
+            routes[f"/api/v2/pokemon/{response['id']}"] = (body, 'application/json')
+            sprite_urls.extend(_sprite_urls(data['sprites']))
+        for species_id, species in self.species.items():
+            routes[f"/api/v2/pokemon-species/{species_id}"] = (rewrite(species), 'application/json')
+        listing = {'count': len(self.species), 'results': [
+            {'name': species['name'], 'url': RECORDED_API + f"pokemon-species/{species_id}/"}
+            for species_id, species in sorted(self.species.items())]}
+        routes["/api/v2/pokemon-species"] = (rewrite(listing), 'application/json')
+        for chain_id, chain in self.chains.items():
+            routes[f"/api/v2/evolution-chain/{chain_id}"] = (rewrite(chain), 'application/json')
+
+        # Sprites the app already downloaded are replayed as they were
+        recorded_sprites = os.path.join(HERE, "sprite_cache")
+        for url in sprite_urls:
+            path = "/sprites/" + url[len(RECORDED_SPRITES):]
+            extension = os.path.splitext(url)[1].lower()
+            recorded_path = os.path.join(recorded_sprites, hashlib.sha1(url.encode('utf-8')).hexdigest() + extension)
+            if os.path.exists(recorded_path):
+                with open(recorded_path, 'rb') as sprite_file:
+                    body = sprite_file.read()
+            else:
+                body = _placeholder_sprite(path)
+            routes[path] = (body, 'image/gif' if extension == '.gif' else 'image/png')
+        return routes
+
+
+def _sprite_urls(node):
+    if isinstance(node, dict):
+        for value in node.values():
+            yield from _sprite_urls(value)
+    elif isinstance(node, str) and node.startswith(RECORDED_SPRITES):
+        yield node
+
+
+class StubServer:
+    # Serves Fixtures.routes() on localhost, with ETags, and an optional
+    # delay per request standing in for network latency
+    def __init__(self, fixtures, latency=0.0):
+        self.latency = latency
+        self.requests = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with stub.lock:
+                    stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                route = stub.routes.get(urlsplit(self.path).path.rstrip('/'))
+                if route is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body, content_type = route
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/"
+        self.routes = fixtures.routes(self.base_url)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def summarize(samples):
+    # Timings in ms
+    return {
+        'unit': 'ms',
+        'runs': len(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'min': min(samples),
+        'max': max(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - started) * 1000
+
+
+class Benchmarks:
+    def __init__(self, fixtures, server, repeat, report):
+        # logic reads its configuration at import time, so it is imported
+        # only once the stub server is up and we are in the scratch directory
+        import logic
+        self.logic = logic
+        self.fixtures = fixtures
+        self.server = server
+        self.repeat = repeat
+        self.report = report
+        self.results = {}
+        self.species_urls = [url.replace(RECORDED_API, server.base_url + "api/v2/") for url in fixtures.species_urls]
+
+    def record(self, name, samples):
+        self.results[name] = summarize(samples)
+        self.report(f"{name:<40} median {self.results[name]['median']:9.3f} ms  ({len(samples)} runs)")
+
+    def reset_cache(self, backend='sqlite'):
+        # Fresh, empty cache files in the scratch directory
+        logic = self.logic
+        logic.CACHE.close()
+        for path in (logic.CACHE_FILE, logic.CACHE_DB_FILE, *stats_table_versions(logic.STATS_FILE)):
+            if os.path.exists(path):
+                os.remove(path)
+        logic.CACHE_BACKEND = backend
+
+    def drop_memory(self):
+        # Keeps the files, forgets everything decoded; reopens the store now
+        # so the timings below are per entry rather than including the open
+        self.logic.CACHE.close()
+        len(self.logic.CACHE)
+
+    def fetch_paths(self, label, fetch, keys):
+        cold, warm_memory, warm_disk = [], [], []
+        for _ in range(self.repeat):
+            self.reset_cache()
+            cold.extend(timed(fetch, key) for key in keys)
+            warm_memory.extend(timed(fetch, key) for key in keys)
+            self.drop_memory()
+            warm_disk.extend(timed(fetch, key) for key in keys)
+        self.record(f"{label}.cold", cold)
+        self.record(f"{label}.warm_memory", warm_memory)
+        self.record(f"{label}.warm_disk", warm_disk)
+
+    def bench_fetch(self):
+        names = sorted(self.fixtures.pokemon)
+        self.fetch_paths('fetch_pokemon_data', self.logic.fetch_pokemon_data, names)
+        self.fetch_paths('fetch_evolution_data', self.logic.fetch_evolution_data, self.species_urls)
+
+    def bench_save_cache(self):
+        # One changed entry written out, with everything in the fixtures cached
+        logic = self.logic
+        names = sorted(self.fixtures.pokemon)
+        for backend in ('json', 'sqlite'):
+            self.reset_cache(backend)
+            for name in names:
+                logic.fetch_pokemon_data(name)
+            for url in self.species_urls:
+                logic.fetch_evolution_data(url)
+            samples = []
+            for i in range(self.repeat * 10):
+                key = logic.resolve_key('pokemon', names[i % len(names)])
+                def write():
+                    logic.CACHE[key] = logic.CACHE[key]
+                    logic.save_cache()
+                samples.append(timed(write))
+            self.record(f"save_cache.{backend}", samples)
+        self.reset_cache()
+
+    def bench_cache_load(self, counts):
+        # Time from opening a cache of N entries to reading one of them
+        from cache_store import LazyCache, SqliteCacheStore, open_store
+        template = next(iter(self.fixtures.pokemon.values()))
+        for count in counts:
+            entries = {f"{template['name']}-{i}": dict(template, name=f"{template['name']}-{i}") for i in range(count)}
+            first = next(iter(entries))
+            json_path = f"load_{count}.json"
+            sqlite_path = f"load_{count}.db"
+            with open(json_path, 'w') as cache_file:
+                json.dump(entries, cache_file)
+            store = SqliteCacheStore(sqlite_path)
+            store.put_many(entries.items())
+            store.close()
+            for backend in ('json', 'sqlite'):
+                samples = []
+                for _ in range(self.repeat):
+                    cache = LazyCache(lambda: open_store(backend, json_path if backend == 'json' else "missing.json", sqlite_path))
+                    samples.append(timed(cache.get, first))
+                    cache.close()
+                self.record(f"cache_load.{backend}.{count}", samples)
+            os.remove(json_path)
+            os.remove(sqlite_path)
+
+    def bench_ui(self):
+        # Needs a display; skipped (and reported as such) when there isn't one
+        try:
+            import tkinter as tk
+            root = tk.Tk()
+        except Exception as e:
+            self.results['ui'] = {'skipped': str(e)}
+            self.report(f"UI benchmarks skipped: {e}")
+            return
+        import app
+        root.withdraw()
+        pokedex = app.PokedexApp(root)
+        try:
+            evolutions = [result for result in map(app.load_evolution, self.species_urls) if result]
+            samples = []
+            for _ in range(self.repeat):
+                for chain, stages in evolutions:
+                    def render():
+                        pokedex.display_evolution_line(chain, stages)
+                        root.update_idletasks()
+                    samples.append(timed(render))
+            self.record("ui.display_evolution_line", samples)
+
+            animated = [data['sprites']['animated'] for data in map(self.logic.fetch_pokemon_data, sorted(self.fixtures.pokemon))
+                        if data and data['sprites'].get('animated')]
+            samples = []
+            for url in animated[:5]:
+                pokedex.display_animation(app.load_animation(url))
+                for _ in range(self.repeat * 10):
+                    if pokedex.animation_job:
+                        root.after_cancel(pokedex.animation_job)
+                        pokedex.animation_job = None
+                    def frame():
+                        pokedex.animate_sprite()
+                        root.update_idletasks()
+                    samples.append(timed(frame))
+            if samples:
+                self.record("ui.animate_sprite", samples)
+        finally:
+            pokedex.on_close()
+
+    def run(self, counts, ui=True):
+        self.bench_fetch()
+        self.bench_save_cache()
+        self.bench_cache_load(counts)
+        if ui:
+            self.bench_ui()
+        self.logic.CACHE.close()
+        return self.results
+
+
+def run_benchmarks(repeat=5, latency=0.0, counts=(100, 1000, 5000), ui=True, report=print):
+    fixtures = Fixtures()
+    server = StubServer(fixtures, latency=latency)
+    workdir = tempfile.mkdtemp(prefix="pokedex-bench-")
+    previous_dir = os.getcwd()
+    previous_base = os.environ.get("POKEAPI_BASE_URL")
+    os.environ["POKEAPI_BASE_URL"] = server.base_url + "api/v2/"
+    os.chdir(workdir)
+    try:
+        results = Benchmarks(fixtures, server, repeat, report).run(counts, ui=ui)
+        requests_served = server.requests
+    finally:
+        os.chdir(previous_dir)
+        if previous_base is None:
+            os.environ.pop("POKEAPI_BASE_URL", None)
+        else:
+            os.environ["POKEAPI_BASE_URL"] = previous_base
+        server.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        'version': RESULTS_VERSION,
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'latency_ms': latency * 1000,
+            'fixture_pokemon': len(fixtures.pokemon),
+            'requests_served': requests_served,
+        },
+        'results': results,
+    }
+
+
+def compare_results(before, after, threshold=10.0, report=print):
+    # Median change per benchmark; returns the names that got slower by more
+    # than threshold percent
+    slower = []
+    report(f"{'benchmark':<40} {'before':>10} {'after':>10} {'change':>8}")
+    for name in sorted(set(before['results']) | set(after['results'])):
+        old = before['results'].get(name, {})
+        new = after['results'].get(name, {})
+        if 'median' not in old or 'median' not in new:
+            report(f"{name:<40} {'-' if 'median' not in old else format(old['median'], '10.3f'):>10} "
+                   f"{'-' if 'median' not in new else format(new['median'], '10.3f'):>10}")
+            continue
+        change = (new['median'] - old['median']) / old['median'] * 100 if old['median'] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  slower"
+            slower.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        report(f"{name:<40} {old['median']:10.3f} {new['median']:10.3f} {change:+7.1f}%{flag}")
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python benchmark.py", description="Benchmark the Pokédex fetch, cache and render paths.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help="run the benchmarks")
+    run.add_argument('--output', help="write the results as JSON to this file")
+    run.add_argument('--repeat', type=int, default=5, help="runs of each benchmark (default 5)")
+    run.add_argument('--latency', type=float, default=0.0, help="seconds the stub server waits per request (default 0)")
+    run.add_argument('--counts', default="100,1000,5000", help="cache sizes for the load benchmark (default 100,1000,5000)")
+    run.add_argument('--no-ui', action='store_true', help="skip the Tk rendering benchmarks")
+    compare = commands.add_parser('compare', help="compare two results files")
+    compare.add_argument('before')
+    compare.add_argument('after')
+    compare.add_argument('--threshold', type=float, default=10.0, help="percent change treated as a difference (default 10)")
+    compare.add_argument('--fail-on-regression', action='store_true', help="exit with 1 if anything got slower")
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        counts = [int(count) for count in args.counts.split(',') if count.strip()]
+        results = run_benchmarks(repeat=args.repeat, latency=args.latency, counts=counts, ui=not args.no_ui)
+        if args.output:
+            with open(args.output, 'w') as results_file:
+                json.dump(results, results_file, indent=2)
+            print(f"Results written to {args.output}")
+        return 0
+
+    with open(args.before, 'r') as before_file:
+        before = json.load(before_file)
+    with open(args.after, 'r') as after_file:
+        after = json.load(after_file)
+    slower = compare_results(before, after, threshold=args.threshold)
+    return 1 if slower and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
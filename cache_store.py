@@ -0,0 +1,382 @@
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from atomic_file import atomic_write
+
+
+class FileLock:
+    # Exclusive lock on a side file, held across processes on one host:
+    # fcntl.flock on POSIX, msvcrt.locking on Windows. Reentrant within a
+    # process only through the caller's own lock.
+    def __init__(self, path):
+        self.path = path
+        self.handle = None
+
+    def __enter__(self):
+        self.handle = open(self.path, 'a+b')
+        if os.name == 'nt':
+            import msvcrt
+            self.handle.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self.handle.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass  # LK_LOCK gives up after ~10s, keep waiting
+        else:
+            import fcntl
+            fcntl.flock(self.handle.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if os.name == 'nt':
+            import msvcrt
+            self.handle.seek(0)
+            msvcrt.locking(self.handle.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(self.handle.fileno(), fcntl.LOCK_UN)
+        self.handle.close()
+        self.handle = None
+        return False
+
+
+class JsonCacheStore:
+    # The original cache format: a single JSON object holding every entry.
+    # Each flush rewrites the whole file, so it is only kept for compatibility.
+    # Flushes are safe with several processes: under a lock file, the latest
+    # file is re-read, this process's changes are applied on top, and the
+    # result is written to a temporary file and renamed over the old one.
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = path + '.lock'
+        self.lock = threading.RLock()
+        self.data = {}
+        self.changed = {}  # Keys set since the last flush
+        self.deleted = set()
+        self.loaded_stamp = None
+        with FileLock(self.lock_path):
+            self._reload()
+
+    def _stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _reload(self):
+        # Picks up what other processes wrote, keeping unflushed changes
+        stamp = self._stamp()
+        if stamp == self.loaded_stamp:
+            return
+        data = {}
+        if stamp is not None:
+            with open(self.path, 'r') as cache_file:
+                data = json.load(cache_file)
+        data.update(self.changed)
+        for key in self.deleted:
+            data.pop(key, None)
+        self.data = data
+        self.loaded_stamp = stamp
+
+    def refresh(self):
+        with self.lock:
+            self._reload()
+
+    def __contains__(self, key):
+        if key in self.data:
+            return True
+        self.refresh()  # Only re-reads the file if another process changed it
+        return key in self.data
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        with self.lock:
+            self.data[key] = value
+            self.changed[key] = value
+            self.deleted.discard(key)
+
+    def __delitem__(self, key):
+        with self.lock:
+            del self.data[key]
+            self.changed.pop(key, None)
+            self.deleted.add(key)
+
+    def __iter__(self):
+        return iter(list(self.data))
+
+    def __len__(self):
+        return len(self.data)
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def keys(self):
+        return list(self.data)
+
+    def flush(self):
+        with self.lock:
+            if not self.changed and not self.deleted:
+                return
+            with FileLock(self.lock_path):
+                self._reload()
+                atomic_write(self.path, lambda cache_file: json.dump(self.data, cache_file), sync=True)
+                self.loaded_stamp = self._stamp()
+            self.changed.clear()
+            self.deleted.clear()
+
+    def close(self):
+        self.flush()
+
+
+class SqliteCacheStore:
+    # Indexed on-disk store: one row per cache key, so a write only touches the
+    # entry that changed and a read only decodes the entry that was asked for.
+    # Several processes can share the file: WAL mode lets readers carry on
+    # while one writes, every write is its own transaction, and pages are
+    # read through a shared memory map rather than copied into each process.
+    def __init__(self, path, mmap_size=64 * 1024 * 1024, busy_timeout=10.0):
+        self.path = path
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, timeout=busy_timeout, check_same_thread=False)
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")  # Durable at checkpoints, never corrupt
+            self.conn.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self.conn.commit()
+
+    def __contains__(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT 1 FROM cache WHERE key = ?", (key,)).fetchone()
+        return row is not None
+
+    def __getitem__(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return json.loads(row[0])
+
+    def __setitem__(self, key, value):
+        self.put_many([(key, value)])
+
+    def __delitem__(self, key):
+        with self.lock:
+            cursor = self.conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self.conn.commit()
+        if cursor.rowcount == 0:
+            raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        with self.lock:
+            return [row[0] for row in self.conn.execute("SELECT key FROM cache")]
+
+    def put_many(self, items):
+        # Writes all the entries in a single transaction
+        rows = [(key, json.dumps(value)) for key, value in items]
+        with self.lock:
+            self.conn.executemany("INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)", rows)
+            self.conn.commit()
+
+    def get_meta(self, key, default=None):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def put_once(self, marker, marker_value, load_items):
+        # Writes the entries load_items() returns unless marker is already set
+        # in meta, then sets it. The check, the writes and the marker are one
+        # BEGIN IMMEDIATE transaction, so when several processes start at once
+        # exactly one of them does it, and nobody overwrites rows another
+        # process wrote after it. Returns how many entries were written.
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self.conn.execute("SELECT 1 FROM meta WHERE key = ?", (marker,)).fetchone():
+                    self.conn.rollback()
+                    return 0
+                rows = [(key, json.dumps(value)) for key, value in load_items()]
+                self.conn.executemany("INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)", rows)
+                self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (marker, str(marker_value)))
+                self.conn.commit()
+            except BaseException:
+                self.conn.rollback()
+                raise
+        return len(rows)
+
+    def refresh(self):
+        # Always reads the committed state, nothing to reload
+        pass
+
+    def flush(self):
+        # Every write is committed straight away, nothing is buffered
+        pass
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class LazyCache:
+    # Dict-like front for a store. Nothing is opened until the cache is first
+    # used, then only the key index is loaded. Entries are decoded on first
+    # access and at most max_entries of them are kept in memory (None = all).
+    def __init__(self, opener, max_entries=None):
+        self.opener = opener
+        self.max_entries = max_entries
+        self.lock = threading.RLock()
+        self._store = None
+        self._keys = None
+        self.entries = OrderedDict()
+
+    @property
+    def store(self):
+        with self.lock:
+            if self._store is None:
+                self._store = self.opener()
+                self._keys = set(self._store.keys())
+            return self._store
+
+    def __contains__(self, key):
+        self.store
+        if key in self._keys:
+            return True
+        # Another process may have added it since the key index was loaded
+        with self.lock:
+            if key in self._store:
+                self._keys.add(key)
+                return True
+        return False
+
+    def __getitem__(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            if key not in self:
+                raise KeyError(key)
+            try:
+                value = self.store[key]
+            except KeyError:
+                self._keys.discard(key)  # Deleted by another process
+                raise
+            self._remember(key, value)
+            return value
+
+    def __setitem__(self, key, value):
+        with self.lock:
+            self.store[key] = value
+            self._keys.add(key)
+            self._remember(key, value)
+
+    def __delitem__(self, key):
+        with self.lock:
+            try:
+                del self.store[key]
+            except KeyError:
+                if key not in self._keys:
+                    raise
+                # Another process deleted it first
+            self._keys.discard(key)
+            self.entries.pop(key, None)
+
+    def __iter__(self):
+        self.refresh_keys()
+        return iter(list(self._keys))
+
+    def __len__(self):
+        self.refresh_keys()
+        return len(self._keys)
+
+    def refresh_keys(self):
+        # Reloads the key index, picking up other processes' additions and
+        # deletions
+        with self.lock:
+            self.store.refresh()
+            self._keys = set(self._store.keys())
+            for key in [key for key in self.entries if key not in self._keys]:
+                del self.entries[key]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return list(self)
+
+    def peek(self, key, default=None):
+        # Like get(), but a miss in memory isn't kept, so walking the whole
+        # cache doesn't push out the entries in use
+        with self.lock:
+            if key in self.entries:
+                return self.entries[key]
+            if key not in self:
+                return default
+            return self.store.get(key, default)
+
+    def _remember(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if self.max_entries is not None:
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def flush(self):
+        with self.lock:
+            if self._store is not None:
+                self._store.flush()
+
+    def close(self):
+        with self.lock:
+            if self._store is not None:
+                self._store.close()
+                self._store = None
+                self._keys = None
+                self.entries.clear()
+
+
+def migrate_json_cache(json_path, store):
+    # One-shot import of an old pokemon_cache.json into another store. The
+    # marker in the meta table stops it from running again on the next start.
+    if store.get_meta('migrated_from_json'):
+        return 0
+
+    def load():
+        if not os.path.exists(json_path):
+            return []
+        with open(json_path, 'r') as cache_file:
+            return json.load(cache_file).items()
+
+    return store.put_once('migrated_from_json', os.path.abspath(json_path), load)
+
+
+def open_store(backend, json_path, sqlite_path):
+    if backend == 'json':
+        return JsonCacheStore(json_path)
+    if backend == 'sqlite':
+        store = SqliteCacheStore(sqlite_path)
+        migrate_json_cache(json_path, store)
+        return store
+    raise ValueError(f"Unknown cache backend '{backend}'")
@@ -0,0 +1,249 @@
+import argparse
+import csv
+import html
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import requests
+import logic
+from records import STAT_NAMES
+from warm import parse_range
+from atomic_file import atomic_write
+
+# Bulk reports without the GUI:
+#   python logic.py export --range 1-151 --format csv --output kanto.csv
+#   python logic.py export --names pikachu,eevee --format jsonl
+#   python logic.py export --range 1-1025 --format html --output dex.html
+# Records stream through a generator pipeline (targets -> concurrent fetch ->
+# record -> writer) with a fixed number in flight, so memory stays the same
+# whether it's 10 Pokémon or the whole dex. Progress goes to stderr.
+
+REPORT_EVERY = 5  # Seconds between progress lines
+THUMBNAIL_SIZE = (96, 96)
+NOT_FOUND = "not found"
+CSV_FIELDS = ['id', 'name', 'types', 'weight', 'height', *STAT_NAMES, 'total', 'genus', 'generation',
+              'evolves_from', 'evolution_line', 'flavor_text', 'sprite_url']
+
+
+def iter_targets(names=None, names_file=None, dex_range=None):
+    # Names or dex numbers to export, one at a time
+    if dex_range:
+        for dex_number in parse_range(dex_range):
+            yield str(dex_number)
+    if names:
+        for name in names.split(','):
+            if name.strip():
+                yield name.strip().lower()
+    if names_file:
+        with open(names_file, 'r') as targets:
+            for line in targets:
+                if line.strip() and not line.startswith('#'):
+                    yield line.strip().lower()
+
+
+def bounded_map(fn, items, workers):
+    # fn over items on a thread pool, yielding (item, result) in input order.
+    # At most workers * 2 items are in flight, however long items is.
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for item in items:
+            pending.append((item, pool.submit(fn, item)))
+            if len(pending) >= workers * 2:
+                item, future = pending.popleft()
+                yield item, future.result()
+        while pending:
+            item, future = pending.popleft()
+            yield item, future.result()
+
+
+def build_record(target, thumbnails_dir=None):
+    # (record, None) for one Pokémon, or (None, reason) if it can't be
+    # exported: NOT_FOUND when the API doesn't know the name, otherwise what
+    # went wrong. A failure only costs this one record, never the export.
+    try:
+        data = logic.fetch_pokemon_data(target)
+        if not data:
+            if logic.is_known_missing('pokemon', target):
+                return None, NOT_FOUND
+            return None, "no answer from the API"
+        species = logic.fetch_species_data(data['species_url']) or {}
+        evolution = logic.fetch_evolution_data(data['species_url'])
+        stats = data.get('stats') or {}
+        record = {
+            'id': data['id'],
+            'name': data['name'],
+            'types': data['types'],
+            'weight': data['weight'],
+            'height': data['height'],
+            **{stat: stats.get(stat) for stat in STAT_NAMES},
+            'total': sum(stats.values()) if stats else None,
+            'genus': species.get('genus'),
+            'generation': species.get('generation'),
+            'evolves_from': species.get('evolves_from'),
+            'evolution_line': logic.chain_species_names(evolution['chain']) if evolution else [],
+            'flavor_text': species.get('flavor_text'),
+            'sprite_url': data['sprites']['front_default'],
+            'thumbnail': None,
+        }
+    except requests.RequestException as e:
+        return None, str(e) or type(e).__name__
+    except (KeyError, TypeError, ValueError) as e:
+        return None, f"unexpected data ({e!r})"
+    if thumbnails_dir and record['sprite_url']:
+        try:
+            record['thumbnail'] = save_thumbnail(record['sprite_url'], thumbnails_dir, data['name'])
+        except OSError:
+            pass  # Not a readable image, or the disk is full; the card goes without
+    return record, None
+
+
+def save_thumbnail(sprite_url, thumbnails_dir, name):
+    # Path of a small PNG of the sprite, made once from the sprite cache
+    path = os.path.join(thumbnails_dir, f"{name}.png")
+    if not os.path.exists(path):
+        image = logic.fetch_sprite_image(sprite_url, THUMBNAIL_SIZE)
+        if image is None:
+            return None
+        atomic_write(path, lambda thumbnail_file: image.save(thumbnail_file, 'PNG'), mode='wb')
+    return path
+
+
+class CsvWriter:
+    def __init__(self, stream):
+        self.writer = csv.DictWriter(stream, fieldnames=CSV_FIELDS, extrasaction='ignore')
+        self.writer.writeheader()
+
+    def write(self, record):
+        row = dict(record, types='/'.join(record['types']), evolution_line=' > '.join(record['evolution_line']))
+        self.writer.writerow(row)
+
+    def close(self):
+        pass
+
+
+class JsonLinesWriter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, record):
+        self.stream.write(json.dumps({key: value for key, value in record.items() if key != 'thumbnail'}) + '\n')
+
+    def close(self):
+        pass
+
+
+class HtmlGalleryWriter:
+    # A single static page, one card per Pokémon, written as records arrive
+    def __init__(self, stream, base_dir):
+        self.stream = stream
+        self.base_dir = base_dir
+        self.stream.write(
+            "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Pokédex</title><style>"
+            "body{font-family:Arial,sans-serif;background:#2C3E50;color:#fff}"
+            ".card{display:inline-block;width:180px;margin:6px;padding:8px;background:#34495E;border-radius:8px;vertical-align:top}"
+            ".card img{width:96px;height:96px;image-rendering:pixelated}.small{font-size:12px;color:#ccc}"
+            "</style></head><body>\n")
+
+    def write(self, record):
+        image = ""
+        if record['thumbnail']:
+            source = os.path.relpath(record['thumbnail'], self.base_dir).replace(os.sep, '/')
+            image = f"<img src=\"{html.escape(source)}\" alt=\"\">"
+        stats = ", ".join(f"{stat} {record[stat]}" for stat in STAT_NAMES if record[stat] is not None)
+        self.stream.write(
+            f"<div class=\"card\">{image}<div><b>#{record['id']} {html.escape(record['name'].capitalize())}</b></div>"
+            f"<div>{html.escape(' / '.join(record['types']))}</div>"
+            f"<div class=\"small\">{html.escape(record['genus'] or '')}</div>"
+            f"<div class=\"small\">{html.escape(stats)}</div>"
+            f"<div class=\"small\">{html.escape(' > '.join(record['evolution_line']))}</div></div>\n")
+
+    def close(self):
+        self.stream.write("</body></html>\n")
+
+
+def export(targets, stream, output_format='csv', workers=8, thumbnails_dir=None, base_dir='.', report=None):
+    # Streams every target through the pipeline into stream. Returns counts
+    # and throughput.
+    if output_format == 'csv':
+        writer = CsvWriter(stream)
+    elif output_format == 'jsonl':
+        writer = JsonLinesWriter(stream)
+    elif output_format == 'html':
+        writer = HtmlGalleryWriter(stream, base_dir)
+    else:
+        raise ValueError(f"Unknown export format '{output_format}'")
+    if thumbnails_dir:
+        os.makedirs(thumbnails_dir, exist_ok=True)
+
+    exported = 0
+    not_found = []
+    failed = []  # (target, reason): the API or the network let us down
+    started = time.time()
+    last_report = started
+    try:
+        for target, (record, reason) in bounded_map(lambda target: build_record(target, thumbnails_dir), targets, workers):
+            if record is not None:
+                writer.write(record)
+                exported += 1
+            elif reason == NOT_FOUND:
+                not_found.append(target)
+            else:
+                failed.append((target, reason))
+            now = time.time()
+            if report and now - last_report >= REPORT_EVERY:
+                last_report = now
+                report(f"{exported} exported, {exported / (now - started):.1f} records/s, "
+                       f"{len(not_found)} not found, {len(failed)} failed")
+    finally:
+        writer.close()
+        logic.save_cache()
+
+    elapsed = time.time() - started
+    rate = exported / elapsed if elapsed > 0 else 0.0
+    if report:
+        report(f"Done: {exported} exported, {len(not_found)} not found, {len(failed)} failed in {elapsed:.1f}s "
+               f"({rate:.1f} records/s)")
+        if not_found:
+            report(f"Not found: {', '.join(not_found[:20])}{' ...' if len(not_found) > 20 else ''}")
+        for target, reason in failed[:20]:
+            report(f"Failed: {target}: {reason}")
+        if len(failed) > 20:
+            report(f"... and {len(failed) - 20} more failed, run the same command again to retry them")
+    return {'exported': exported, 'not_found': not_found, 'failed': failed, 'seconds': elapsed, 'rate': rate}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python logic.py export", description="Export Pokédex data without the GUI.")
+    parser.add_argument('--range', dest='dex_range', help="dex numbers, e.g. 1-151,250")
+    parser.add_argument('--names', help="comma separated names")
+    parser.add_argument('--names-file', help="file with one name or dex number per line")
+    parser.add_argument('--format', choices=['csv', 'jsonl', 'html'], default='csv', help="output format (default csv)")
+    parser.add_argument('--output', default='-', help="file to write, - for stdout (default)")
+    parser.add_argument('--workers', type=int, default=8, help="concurrent fetches (default 8)")
+    parser.add_argument('--no-thumbnails', action='store_true', help="html: leave out the sprite thumbnails")
+    args = parser.parse_args(argv)
+    if not (args.dex_range or args.names or args.names_file):
+        parser.error("give --range, --names or --names-file")
+
+    thumbnails_dir = None
+    base_dir = '.'
+    if args.format == 'html' and not args.no_thumbnails:
+        if args.output == '-':
+            parser.error("html with thumbnails needs --output, the images go next to it")
+        base_dir = os.path.dirname(os.path.abspath(args.output))
+        thumbnails_dir = os.path.splitext(os.path.abspath(args.output))[0] + "_thumbnails"
+
+    report = lambda message: print(message, file=sys.stderr)
+    targets = iter_targets(args.names, args.names_file, args.dex_range)
+    try:
+        if args.output == '-':
+            result = export(targets, sys.stdout, args.format, args.workers, thumbnails_dir, base_dir, report)
+        else:
+            with open(args.output, 'w', newline='' if args.format == 'csv' else None, encoding='utf-8') as stream:
+                result = export(targets, stream, args.format, args.workers, thumbnails_dir, base_dir, report)
+    except KeyboardInterrupt:
+        return 130
+    return 1 if result['failed'] or (result['not_found'] and not result['exported']) else 0
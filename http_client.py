@@ -0,0 +1,108 @@
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+import perf
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RequestsTransport:
+    # Default transport: one keep-alive Session per host, so repeated calls to
+    # pokeapi.co or raw.githubusercontent.com reuse their TLS connections.
+    # Any object with the same send() can stand in for it, e.g. in tests.
+    def __init__(self, pool_size=10):
+        self.pool_size = pool_size
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def session_for(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            session = self.sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self.sessions[host] = session
+            return session
+
+    def send(self, method, url, headers=None, timeout=None):
+        return self.session_for(url).request(method, url, headers=headers, timeout=timeout)
+
+    def close(self):
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
+
+
+class HttpClient:
+    # The one place the app talks HTTP. Adds timeouts, retries with jittered
+    # exponential backoff on 429/5xx and dropped connections, and a cap on how
+    # many requests can be in flight to each host at once.
+    def __init__(self, transport=None, connect_timeout=5, read_timeout=15, retries=4, backoff=0.5, max_backoff=30, max_per_host=8):
+        self.transport = transport or RequestsTransport(pool_size=max_per_host)
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_per_host = max_per_host
+        self.limiters = {}
+        self.lock = threading.Lock()
+        self.bytes_received = 0  # Response bodies, for anything rationing bandwidth
+
+    def limiter_for(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            if host not in self.limiters:
+                self.limiters[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self.limiters[host]
+
+    def retry_delay(self, attempt, response=None):
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), self.max_backoff)
+        # "Full jitter": anywhere up to the exponential step, so clients that
+        # failed together don't all come back at the same moment
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def get(self, url, headers=None, timeout=None):
+        with perf.span('http'):
+            return self._get(url, headers, timeout)
+
+    def _get(self, url, headers, timeout):
+        limiter = self.limiter_for(url)
+        for attempt in range(self.retries + 1):
+            response = None
+            try:
+                with limiter:
+                    response = self.transport.send('GET', url, headers=headers, timeout=timeout or self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+            if response is not None and (response.status_code not in RETRY_STATUSES or attempt == self.retries):
+                with self.lock:
+                    self.bytes_received += len(getattr(response, 'content', None) or b'')
+                if perf.ENABLED:
+                    self._measure(response)
+                return response
+            perf.count('http.retries')
+            time.sleep(self.retry_delay(attempt, response))
+
+    def _measure(self, response):
+        # requests can't split out DNS/TLS; elapsed runs from sending the
+        # request to parsing the headers (connect included), the rest of the
+        # http span is the body download
+        perf.count('http.requests')
+        elapsed = getattr(response, 'elapsed', None)
+        if elapsed is not None:
+            perf.record('http.headers', elapsed.total_seconds())
+        perf.count('http.bytes', len(response.content or b''))
+
+    def close(self):
+        self.transport.close()
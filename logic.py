@@ -1,80 +1,549 @@
 import requests
-import json
 import time
 import os
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from cache_store import LazyCache, open_store
+from http_client import HttpClient
+import perf
+from name_index import build_name_index, load_name_index, save_name_index
+from move_index import MoveIndex
+from records import EvolutionChainRecord, MoveRecord, PokemonRecord, SpeciesRecord, is_current
+from sprite_cache import SpriteCache
 
-# The API to fetch the required data about Pokemon
-POKEAPI_URL = "https://pokeapi.co/api/v2/pokemon/"
-POKEAPI_SPECIES_URL = "https://pokeapi.co/api/v2/pokemon-species/"
-POKEAPI_EVOLUTION_URL = "https://pokeapi.co/api/v2/evolution-chain/"
+# The API to fetch the required data about Pokemon. POKEAPI_BASE_URL can point
+# at a mirror or a local stand-in server.
+POKEAPI_BASE_URL = os.environ.get("POKEAPI_BASE_URL", "https://pokeapi.co/api/v2/")
+POKEAPI_URL = POKEAPI_BASE_URL + "pokemon/"
+POKEAPI_SPECIES_URL = POKEAPI_BASE_URL + "pokemon-species/"
+POKEAPI_EVOLUTION_URL = POKEAPI_BASE_URL + "evolution-chain/"
+POKEAPI_MOVE_URL = POKEAPI_BASE_URL + "move/"
 
 CACHE_FILE = "pokemon_cache.json"
+CACHE_DB_FILE = "pokemon_cache.db"
+NAME_INDEX_FILE = "pokemon_names.json"
+STATS_FILE = "pokemon_stats.bin"  # Columnar numeric attributes of every cached Pokémon
+LANGUAGE = os.environ.get("POKEDEX_LANGUAGE", "en")  # Language kept for flavor text and genus
 CACHE_EXPIRY_TIME = 3600  # Cache expiration time (1 hour in seconds)
+# How long each kind of entry counts as fresh. Older entries are still served
+# straight away, and refreshed in the background with a conditional GET.
+CACHE_TTL = {
+    'pokemon': 7 * 24 * 3600,
+    'species': 30 * 24 * 3600,
+    'evolution': 30 * 24 * 3600,
+    'move': 30 * 24 * 3600,
+}
+NEGATIVE_TTL = 300  # How long a "not found" is remembered before asking again
+CHAIN_FETCH_WORKERS = 6  # Most requests in flight at once for one evolution chain
+MOVE_FETCH_WORKERS = 8  # Most requests in flight at once when fetching move details
 
-if os.path.exists(CACHE_FILE):
-    with open(CACHE_FILE, 'r') as cache_file:
-        CACHE = json.load(cache_file)
-else:
-    CACHE = {}
-    
-def is_cache_expired(timestamp):
+# Idle-time prefetching in the app (see prefetch.py)
+USER_DATA_FILE = "user_data.json"  # History, favorites and team, kept between runs
+PREFETCH_MAX_POKEMON = int(os.environ.get("POKEDEX_PREFETCH_MAX_POKEMON", "50"))  # Downloads per session, 0 turns it off
+PREFETCH_BYTES_PER_SECOND = int(os.environ.get("POKEDEX_PREFETCH_BYTES_PER_SECOND", str(256 * 1024)))  # 0 turns it off too
+PREFETCH_NEIGHBOURS = 2  # Dex numbers either side of a search to fetch
+
+# Shared HTTP client, every request in the app goes through it
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("POKEDEX_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.environ.get("POKEDEX_READ_TIMEOUT", "15"))
+HTTP_RETRIES = 4  # Retries on rate limiting (429), server errors and dropped connections
+HTTP_MAX_PER_HOST = 8  # Requests in flight at once to a single host
+CLIENT = HttpClient(
+    connect_timeout=HTTP_CONNECT_TIMEOUT,
+    read_timeout=HTTP_READ_TIMEOUT,
+    retries=HTTP_RETRIES,
+    max_per_host=HTTP_MAX_PER_HOST,
+)
+
+SPRITE_CACHE_DIR = "sprite_cache"
+SPRITE_DISK_BUDGET = 64 * 1024 * 1024  # Downloaded sprite bytes kept on disk
+SPRITE_MEMORY_BUDGET = 32 * 1024 * 1024  # Decoded, resized sprites kept in memory
+
+# 'sqlite' writes one row per entry; 'json' keeps the old single-file format.
+# The first sqlite start imports pokemon_cache.json once.
+CACHE_BACKEND = os.environ.get("POKEDEX_CACHE_BACKEND", "sqlite")
+CACHE_MAX_ENTRIES = int(os.environ.get("POKEDEX_CACHE_MAX_ENTRIES", "256"))  # Decoded entries kept in memory
+
+# The store is only opened the first time CACHE is used, not at import
+CACHE = LazyCache(lambda: open_store(CACHE_BACKEND, CACHE_FILE, CACHE_DB_FILE), max_entries=CACHE_MAX_ENTRIES)
+
+def is_cache_expired(timestamp, ttl=CACHE_EXPIRY_TIME):
     current_time = time.time()
-    return (current_time - timestamp) > CACHE_EXPIRY_TIME
+    return (current_time - timestamp) > ttl
 
 def save_cache():
-    with open(CACHE_FILE, 'w') as cache_file:
-        json.dump(CACHE, cache_file)
+    with perf.span('save_cache'):
+        CACHE.flush()
 
-def fetch_pokemon_data(pokemon_name):
-    pokemon_name = pokemon_name.lower()
-    if pokemon_name in CACHE:
-        return CACHE[pokemon_name]
-
-    response = requests.get(POKEAPI_URL + pokemon_name)
-    if response.status_code == 200:
-        data = response.json()
-        parsed_data = {
-            'name': data['name'],
-            'weight': data['weight'] / 10,
-            'height': data['height'] / 10,
-            'sprites': data['sprites'],
-            'species_url': data['species']['url'],
-            'moves': [move['move']['name'] for move in data['moves']],
-            'types': [t['type']['name'] for t in data['types']]
-        }
-        CACHE[pokemon_name] = parsed_data
+# Requests currently on the wire, so concurrent callers can share them
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+def _single_flight(key, fn, *args):
+    # Callers asking for the same key at the same time share one call to fn
+    with _inflight_lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = Future()
+            _inflight[key] = future
+    if not owner:
+        return future.result()
+    try:
+        result = fn(*args)
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+def _make_entry(kind, value, response=None):
+    # Every cache entry is wrapped with when it was stored and the validators
+    # the server sent, so it can be revalidated later
+    headers = response.headers if response is not None else {}
+    return {
+        'envelope': 1,
+        'kind': kind,
+        'stored_at': time.time(),
+        'etag': headers.get('ETag'),
+        'last_modified': headers.get('Last-Modified'),
+        'value': value,
+    }
+
+# Every entry is stored under a canonical "<kind>:<id>" key, e.g.
+# "pokemon:25" or "species:25". Numeric ids and API URLs turn into that key
+# directly; names go through small "alias:<kind>:<name>" entries, memoised in
+# _aliases. "Pikachu", "25" and ".../pokemon/25/" all reach the same entry.
+# Moves are identified by name, their records don't carry an id.
+ID_FIELD = {'pokemon': 'id', 'species': 'id', 'evolution': 'id', 'move': 'name'}
+_aliases = {}  # (kind, name) -> canonical key
+
+def resource_key(kind, ident):
+    return f"{kind}:{ident}"
+
+def _identifier(ident):
+    # "Pikachu", "25" or an API URL -> "pikachu" / "25"
+    ident = str(ident).strip().lower()
+    if '://' in ident:
+        ident = ident.rstrip('/').rsplit('/', 1)[1]
+    return ident
+
+def resolve_key(kind, ident):
+    # The canonical key for a name, id or URL, or None for a name not seen yet
+    ident = _identifier(ident)
+    if ID_FIELD[kind] == 'name':
+        return resource_key(kind, ident)
+    if ident.isdigit():
+        return resource_key(kind, int(ident))
+    key = _aliases.get((kind, ident))
+    if key is None:
+        key = CACHE.peek(f"alias:{kind}:{ident}")
+        if key is not None:
+            _aliases[(kind, ident)] = key
+    return key
+
+def _remember_aliases(kind, key, names):
+    for name in names:
+        name = _identifier(name or '')
+        if name and not name.isdigit() and _aliases.get((kind, name)) != key:
+            _aliases[(kind, name)] = key
+            CACHE[f"alias:{kind}:{name}"] = key
+
+def _known_missing(kind, ident):
+    # True while a recent 404 for this name is remembered
+    key = f"missing:{kind}:{ident}"
+    entry = CACHE.get(key)
+    if entry is None:
+        return False
+    if not is_cache_expired(entry['stored_at'], NEGATIVE_TTL):
+        perf.count(f'cache.{kind}.negative_hit')
+        return True
+    del CACHE[key]
+    return False
+
+def is_known_missing(kind, ident):
+    # True when ident was recently not found upstream, as opposed to a fetch
+    # that failed for some other reason
+    return _known_missing(kind, _identifier(ident))
+
+def _legacy_key(kind, ident, url):
+    # Where versions before canonical keys kept this: Pokémon under the name
+    # or number as typed, everything else under its URL
+    return ident if kind == 'pokemon' else url
+
+def _legacy_keys(kind, ident, url, value):
+    # Every pre-canonical key this record may have been cached under: the one
+    # for the ident as typed, and the ones for its name and its id
+    keys = {_legacy_key(kind, ident, url)}
+    base_url = {'species': POKEAPI_SPECIES_URL, 'evolution': POKEAPI_EVOLUTION_URL, 'move': POKEAPI_MOVE_URL}.get(kind)
+    for alias in (value.get('name'), value.get('id')):
+        if alias is None:
+            continue
+        alias = str(alias).lower()
+        if kind == 'pokemon':
+            keys.add(alias)
+        else:
+            keys.update((f"{base_url}{alias}", f"{base_url}{alias}/"))
+    return keys
+
+def _drop_legacy_keys(kind, ident, url, key, value):
+    # Once the canonical entry is written, copies left under old keys would
+    # never be refreshed again, and old Pokémon keys would still be counted
+    for legacy_key in _legacy_keys(kind, ident, url, value):
+        if legacy_key != key and legacy_key in CACHE:
+            del CACHE[legacy_key]
+
+def _upgrade_entry(entry, kind, record_type, options):
+    # The entry with its value in the current compact form. Bare entries
+    # written by older versions are wrapped (as already stale) and
+    # re-projected.
+    upgraded = entry
+    if 'envelope' not in upgraded:
+        upgraded = {'envelope': 1, 'kind': kind, 'stored_at': 0, 'etag': None, 'last_modified': None, 'value': upgraded}
+    if not is_current(record_type, upgraded['value']):
+        # Older projections can't fill fields added since (e.g. base stats),
+        # so drop the validators and mark it stale: the background refresh
+        # then downloads the full resource instead of getting a 304
+        upgraded = dict(upgraded, value=record_type.from_api(upgraded['value'], **options).to_dict(),
+                        stored_at=0, etag=None, last_modified=None)
+    return upgraded
+
+def _cached_entry(key, kind, record_type, **options):
+    # Returns the cached envelope for key in the current form, writing it back
+    # once if it had to be upgraded
+    entry = CACHE.get(key) if key is not None else None
+    if entry is None:
+        perf.count(f'cache.{kind}.miss')
+        return None
+    perf.count(f'cache.{kind}.hit')
+    upgraded = _upgrade_entry(entry, kind, record_type, options)
+    if upgraded is not entry:
+        CACHE[key] = upgraded
         save_cache()
-        return parsed_data
-    return None
+    return upgraded
+
+def _adopt_legacy_entry(kind, ident, url, record_type, options):
+    # Moves an entry from its pre-canonical key to its canonical one. Very old
+    # Pokémon entries don't know their id; they stay put, are served stale
+    # and get moved once the refresh has downloaded them.
+    legacy_key = _legacy_key(kind, ident, url)
+    entry = CACHE.get(legacy_key)
+    if entry is None:
+        return None, None
+    entry = _upgrade_entry(entry, kind, record_type, options)
+    ident_value = entry['value'].get(ID_FIELD[kind])
+    if ident_value is None:
+        CACHE[legacy_key] = entry
+        save_cache()
+        return entry, legacy_key
+    key = resource_key(kind, ident_value)
+    CACHE[key] = entry
+    _remember_aliases(kind, key, [ident, entry['value'].get('name')])
+    _drop_legacy_keys(kind, ident, url, key, entry['value'])
+    save_cache()
+    return entry, key
 
-def fetch_species_data(species_url):
-    if species_url in CACHE:
-        return CACHE[species_url]
+def _download_resource(kind, ident, url, record_type, entry, options):
+    # GETs url, conditionally when we already hold an entry, and stores the
+    # result under its canonical key. A 304 only refreshes stored_at, a 404
+    # is remembered for NEGATIVE_TTL.
+    with perf.span(f'fetch.{kind}'):
+        return _download_and_store(kind, ident, url, record_type, entry, options)
 
-    response = requests.get(species_url)
-    if response.status_code == 200:
-        species_data = response.json()
-        CACHE[species_url] = species_data
+def _download_and_store(kind, ident, url, record_type, entry, options):
+    headers = {}
+    if options.get('language'):
+        headers['Accept-Language'] = options['language']  # The proxy projects species in it, PokeAPI ignores it
+    if entry:
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+    response = CLIENT.get(url, headers=headers)
+    if response.status_code == 304 and entry:
+        entry = dict(entry, stored_at=time.time())
+    elif response.status_code == 200:
+        with perf.span('parse'):
+            value = record_type.from_api(response.json(), **options).to_dict()
+        entry = _make_entry(kind, value, response)
+        if kind == 'pokemon':
+            _stats_changed.set()
+    elif response.status_code == 404:
+        CACHE[f"missing:{kind}:{ident}"] = _make_entry('missing', None, response)
         save_cache()
-        return species_data
-    return None
+        return None
+    else:
+        return None
+    ident_value = entry['value'].get(ID_FIELD[kind])
+    key = resource_key(kind, ident_value if ident_value is not None else ident)
+    CACHE[key] = entry
+    _remember_aliases(kind, key, [ident, entry['value'].get('name')])
+    _drop_legacy_keys(kind, ident, url, key, entry['value'])
+    save_cache()
+    return entry['value']
+
+# Background refreshes of stale entries. At most one is pending per entry,
+# and the workers are daemon threads: refreshes still queued when the process
+# exits are dropped rather than waited for (the entry is simply still stale
+# next time).
+REVALIDATE_WORKERS = 2
+_refresh_queue = queue.SimpleQueue()
+_refreshing = set()  # _job_key of every refresh queued or running
+_refresh_lock = threading.Lock()
+_refresh_workers = []
+
+def _job_key(kind, ident, options):
+    # Downloads of one entry in two languages must not stand in for each other
+    return (kind, ident, *sorted(options.items()))
+
+def _queue_refresh(kind, ident, url, record_type, options):
+    with _refresh_lock:
+        if _job_key(kind, ident, options) in _refreshing:
+            return
+        _refreshing.add(_job_key(kind, ident, options))
+        if len(_refresh_workers) < REVALIDATE_WORKERS:
+            worker = threading.Thread(target=_refresh_worker, name=f'revalidate-{len(_refresh_workers)}', daemon=True)
+            _refresh_workers.append(worker)
+            worker.start()
+    _refresh_queue.put((kind, ident, url, record_type, options))
+
+def _refresh_worker():
+    while True:
+        kind, ident, url, record_type, options = _refresh_queue.get()
+        try:
+            _revalidate(kind, ident, url, record_type, options)
+        except Exception as e:
+            print(f"Background refresh of {kind} {ident} failed: {e}")
+        finally:
+            with _refresh_lock:
+                _refreshing.discard(_job_key(kind, ident, options))
+
+def _revalidate(kind, ident, url, record_type, options):
+    # The entry is read again here, it may have been refreshed (by a search
+    # or another process) since the refresh was queued
+    key = resolve_key(kind, ident)
+    entry = (CACHE.get(key) if key is not None else None) or CACHE.get(_legacy_key(kind, ident, url))
+    if entry is not None:
+        entry = _upgrade_entry(entry, kind, record_type, options)
+        if not is_cache_expired(entry['stored_at'], CACHE_TTL[kind]):
+            return
+    try:
+        _single_flight(_job_key(kind, ident, options), _download_resource, kind, ident, url, record_type, entry, options)
+    except requests.RequestException:
+        pass  # Offline or the server is down, keep serving what we have
+
+def _fetch_resource(kind, ident, url, record_type, accept=None, **options):
+    # Stale-while-revalidate: anything cached is returned immediately, and if
+    # it is past its TTL a refresh is queued in the background. Only a miss
+    # waits for the network, unless the name was recently not found.
+    ident = _identifier(ident)
+    entry = _cached_entry(resolve_key(kind, ident), kind, record_type, **options)
+    if entry is None:
+        entry, _ = _adopt_legacy_entry(kind, ident, url, record_type, options)
+    if entry and (accept is None or accept(entry['value'])):
+        if is_cache_expired(entry['stored_at'], CACHE_TTL[kind]):
+            _queue_refresh(kind, ident, url, record_type, options)
+        return entry['value']
+    if _known_missing(kind, ident):
+        return None
+    return _single_flight(_job_key(kind, ident, options), _download_resource, kind, ident, url, record_type, None, options)
+
+def fetch_pokemon_data(pokemon_name):
+    pokemon_name = _identifier(pokemon_name)
+    return _fetch_resource('pokemon', pokemon_name, POKEAPI_URL + pokemon_name, PokemonRecord)
+
+def _is_pokemon_key(key):
+    # Canonical Pokémon keys, and names or numbers from before those
+    return key.startswith('pokemon:') or (':' not in key and '/' not in key)
+
+def cached_pokemon():
+    # Every Pokémon currently in the cache, once each, without going to the
+    # network
+    seen = set()
+    for key in CACHE:
+        if not _is_pokemon_key(key):
+            continue
+        entry = CACHE.peek(key)
+        if entry is None:
+            continue
+        data = entry['value'] if 'envelope' in entry else entry
+        if not is_current(PokemonRecord, data):
+            data = PokemonRecord.from_api(data).to_dict()
+        if data['name'] not in seen:
+            seen.add(data['name'])
+            yield data
+
+# The stats table is rebuilt from the cache when a Pokémon was downloaded
+# since, or when the number of cached Pokémon no longer matches (another
+# process, e.g. warm, added some)
+_stats_table = None
+_stats_lock = threading.Lock()
+_stats_changed = threading.Event()
+
+def _pokemon_key_count():
+    return sum(1 for key in CACHE if _is_pokemon_key(key))
+
+def fetch_stats_table():
+    global _stats_table
+    # stats_store pulls in NumPy, which only the Browse and Team tabs need
+    from stats_store import load_latest_stats_table, load_stats_table, save_stats_table
+    with _stats_lock:
+        count = _pokemon_key_count()
+        if _stats_table is None or _stats_table.source != count:
+            # Another process (warm) may have rebuilt it already
+            _stats_table = load_latest_stats_table(STATS_FILE) or _stats_table
+        if _stats_table is None or _stats_table.source != count or _stats_changed.is_set():
+            _stats_changed.clear()
+            _stats_table = load_stats_table(save_stats_table(cached_pokemon(), STATS_FILE, source=count))
+        return _stats_table
+
+def fetch_species_data(species_url, language=None):
+    language = language or LANGUAGE
+    return _fetch_resource('species', species_url, species_url, SpeciesRecord,
+                           accept=lambda data: data['language'] == language, language=language)
 
 def fetch_evolution_data(species_url):
     species_data = fetch_species_data(species_url)
-    if species_data:
-        evolution_chain_url = species_data['evolution_chain']['url']
-        if evolution_chain_url in CACHE and not is_cache_expired(CACHE[evolution_chain_url].get('timestamp', 0)):
-            return CACHE[evolution_chain_url]
-
+    if species_data and species_data['evolution_chain_url']:
         try:
-            response = requests.get(evolution_chain_url)
-            response.raise_for_status()
+            return fetch_evolution_chain(species_data['evolution_chain_url'])
         except requests.RequestException:
             return None
+    return None
+
+def fetch_evolution_chain(evolution_chain_url):
+    return _fetch_resource('evolution', evolution_chain_url, evolution_chain_url, EvolutionChainRecord)
+
+def fetch_move_data(move_name):
+    # Type, power, accuracy, PP and damage class of one move
+    try:
+        return _fetch_resource('move', move_name, POKEAPI_MOVE_URL + move_name, MoveRecord)
+    except requests.RequestException:
+        return None
+
+def fetch_moves_bulk(move_names, workers=MOVE_FETCH_WORKERS, cancelled=None):
+    # Details for many moves at once. Each distinct move is looked up once,
+    # cached ones come straight from the cache and only the rest go out, a
+    # few at a time. Most moves are shared between Pokémon, so after a few
+    # searches this is nearly all cache hits. Returns {name: move data}.
+    # cancelled() is checked between batches of downloads; once it's true the
+    # moves fetched so far are returned and the rest are left alone.
+    names = list(dict.fromkeys(move_names))
+    missing = [name for name in names if resolve_key('move', name) not in CACHE]
+    moves = {}
+    if missing:
+        batch_size = workers * 2
+        fetch = perf.bind(fetch_move_data)
+        with ThreadPoolExecutor(max_workers=min(workers, len(missing))) as pool:
+            for start in range(0, len(missing), batch_size):
+                if cancelled is not None and cancelled():
+                    return {name: data for name, data in moves.items() if data}
+                batch = missing[start:start + batch_size]
+                for name, data in zip(batch, pool.map(fetch, batch)):
+                    moves[name] = data
+    for name in names:
+        if name not in moves:
+            moves[name] = fetch_move_data(name)
+    return {name: data for name, data in moves.items() if data}
+
+def fetch_moveset(move_names, cancelled=None):
+    # A MoveIndex over a Pokémon's moves, for filtering and sorting in memory
+    return MoveIndex(fetch_moves_bulk(move_names, cancelled=cancelled).values())
+
+def fetch_name_index():
+    # The local name/dex number index, built from the species list and saved
+    # on first use, loaded from disk after that
+    index = load_name_index(NAME_INDEX_FILE)
+    if index is None:
+        index = build_name_index(POKEAPI_SPECIES_URL, CLIENT)
+        save_name_index(index, NAME_INDEX_FILE)
+    return index
+
+def fetch_sprite(sprite_url):
+    # Raw image bytes for a sprite URL, or None if it can't be downloaded
+    return SPRITES.get_bytes(sprite_url)
+
+def fetch_sprite_image(sprite_url, size=None):
+    # Decoded sprite resized to size, shared through the in-memory LRU
+    return SPRITES.get_image(sprite_url, size)
+
+def fetch_sprite_frames(sprite_url):
+    # Decoded frames and durations of an animated sprite, shared through the LRU
+    return SPRITES.get_frames(sprite_url)
+
+def _download_sprite(sprite_url):
+    try:
+        response = CLIENT.get(sprite_url)
+        response.raise_for_status()
+    except requests.RequestException:
+        return None
+    return response.content
+
+SPRITES = SpriteCache(
+    SPRITE_CACHE_DIR,
+    fetch=lambda url: _single_flight(('sprite', url), _download_sprite, url),
+    disk_budget=SPRITE_DISK_BUDGET,
+    memory_budget=SPRITE_MEMORY_BUDGET,
+)
+
+def chain_species_names(chain):
+    # Every species in an evolution chain, depth first, without repeats
+    names = []
+
+    def walk(node):
+        species_name = node['species']['name']
+        if species_name not in names:
+            names.append(species_name)
+        for next_evolution in node.get('evolves_to', []):
+            walk(next_evolution)
+
+    walk(chain)
+    return names
+
+def _fetch_chain_stage(species_name, with_sprites, sprite_size):
+    data = fetch_pokemon_data(species_name)
+    sprite = None
+    if data and with_sprites and data['sprites'].get('front_default'):
+        sprite_url = data['sprites']['front_default']
+        try:
+            sprite = fetch_sprite_image(sprite_url, sprite_size) if sprite_size else fetch_sprite(sprite_url)
+        except OSError:
+            sprite = None  # Not a readable image
+    return data, sprite
+
+def fetch_chain_bundle(chain, with_sprites=True, sprite_size=None):
+    # Fetches every stage of an evolution chain in parallel, so the wait is
+    # roughly the slowest stage rather than the sum of all of them. Returns
+    # {'chain': chain, 'pokemon': {name: data}, 'sprites': {name: sprite}}
+    # where a sprite is raw bytes, or a resized image when sprite_size is set.
+    names = chain_species_names(chain)
+    with ThreadPoolExecutor(max_workers=min(CHAIN_FETCH_WORKERS, len(names))) as pool:
+        results = list(pool.map(perf.bind(lambda name: _fetch_chain_stage(name, with_sprites, sprite_size)), names))
+
+    bundle = {'chain': chain, 'pokemon': {}, 'sprites': {}}
+    for species_name, (data, sprite) in zip(names, results):
+        if data:
+            bundle['pokemon'][species_name] = data
+        if sprite:
+            bundle['sprites'][species_name] = sprite
+    return bundle
+
+
+if __name__ == "__main__":
+    import sys
+    import export
+    import warm
 
-        if response.status_code == 200:
-            evolution_data = response.json()
-            CACHE[evolution_chain_url] = evolution_data
-            save_cache()
-            return evolution_data
-    return None
\ No newline at end of file
+    # python logic.py warm --range 1-1025
+    # python logic.py export --range 1-151 --format csv --output kanto.csv
+    if len(sys.argv) > 1 and sys.argv[1] == 'warm':
+        sys.exit(warm.main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == 'export':
+        sys.exit(export.main(sys.argv[2:]))
+    print("usage: python logic.py warm [--range 1-1025] [--workers N] [--no-sprites]")
+    print("       python logic.py export (--range 1-151 | --names a,b | --names-file path) [--format csv|jsonl|html] [--output path]")
+    sys.exit(2)
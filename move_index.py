@@ -0,0 +1,44 @@
+# In-memory index over a set of move details (see logic.fetch_moves_bulk), so a
+# moveset can be filtered and re-sorted without going back to the network.
+
+SORT_KEYS = ('name', 'type', 'damage_class', 'power', 'accuracy', 'pp', 'priority')
+
+
+class MoveIndex:
+    def __init__(self, moves):
+        # moves: compact move dicts as stored in the cache
+        self.moves = sorted(moves, key=lambda move: move['name'])
+        self.by_name = {move['name']: move for move in self.moves}
+        self.by_type = {}
+        self.by_damage_class = {}
+        for move in self.moves:
+            self.by_type.setdefault(move['type'], []).append(move)
+            self.by_damage_class.setdefault(move['damage_class'], []).append(move)
+
+    def __len__(self):
+        return len(self.moves)
+
+    def types(self):
+        return sorted(move_type for move_type in self.by_type if move_type)
+
+    def query(self, move_type=None, damage_class=None, min_power=None, sort_by='name', descending=False):
+        # Filters by type / damage class / power and sorts on any of SORT_KEYS.
+        # Moves without a value for the sort key (e.g. status moves have no
+        # power) always go last.
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"Can't sort moves by '{sort_by}'")
+        if move_type:
+            moves = self.by_type.get(move_type, [])
+        elif damage_class:
+            moves = self.by_damage_class.get(damage_class, [])
+        else:
+            moves = self.moves
+        if move_type and damage_class:
+            moves = [move for move in moves if move['damage_class'] == damage_class]
+        if min_power is not None:
+            moves = [move for move in moves if (move['power'] or 0) >= min_power]
+
+        present = [move for move in moves if move[sort_by] is not None]
+        missing = [move for move in moves if move[sort_by] is None]
+        present.sort(key=lambda move: move[sort_by], reverse=descending)
+        return present + missing
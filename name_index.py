@@ -0,0 +1,116 @@
+import json
+import os
+from bisect import bisect_left
+from atomic_file import atomic_write
+
+# Every Pokémon name and national dex number, kept locally so typeahead,
+# "did you mean" and dex number lookups never need the network. The list is
+# fetched once from the species endpoint and saved next to the cache.
+
+NAME_INDEX_VERSION = 1
+
+
+def _trigrams(name):
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b):
+    # Levenshtein distance, one row at a time
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+class NameIndex:
+    def __init__(self, entries):
+        # entries: (dex number, name) pairs
+        self.by_id = {}
+        self.by_name = {}
+        for dex_number, name in entries:
+            self.by_id[dex_number] = name
+            self.by_name[name] = dex_number
+        self.names = sorted(self.by_name)
+        self.trigrams = {}
+        for position, name in enumerate(self.names):
+            for trigram in _trigrams(name):
+                self.trigrams.setdefault(trigram, []).append(position)
+
+    def __len__(self):
+        return len(self.names)
+
+    def resolve(self, query):
+        # (dex number, name) for an exact name or dex number, else None
+        query = query.strip().lower()
+        if query.isdigit():
+            dex_number = int(query)
+            return (dex_number, self.by_id[dex_number]) if dex_number in self.by_id else None
+        if query in self.by_name:
+            return self.by_name[query], query
+        return None
+
+    def complete(self, prefix, limit=8):
+        # Names starting with prefix, alphabetically
+        prefix = prefix.strip().lower()
+        matches = []
+        position = bisect_left(self.names, prefix)
+        while position < len(self.names) and self.names[position].startswith(prefix) and len(matches) < limit:
+            matches.append(self.names[position])
+            position += 1
+        return matches
+
+    def correct(self, query, limit=3, max_distance=None):
+        # Closest names to a misspelling. Trigram overlap picks a short list
+        # of candidates so only a handful of edit distances are computed.
+        query = query.strip().lower()
+        if not query:
+            return []
+        if max_distance is None:
+            max_distance = max(1, len(query) // 3)
+        shared = {}
+        for trigram in _trigrams(query):
+            for position in self.trigrams.get(trigram, ()):
+                shared[position] = shared.get(position, 0) + 1
+        candidates = [position for position in shared if abs(len(self.names[position]) - len(query)) <= max_distance]
+        candidates.sort(key=shared.get, reverse=True)
+        scored = []
+        for position in candidates[:20]:
+            name = self.names[position]
+            distance = edit_distance(query, name)
+            if distance <= max_distance:
+                scored.append((distance, -shared[position], name))
+        return [name for _, _, name in sorted(scored)[:limit]]
+
+    def to_json(self):
+        return {'version': NAME_INDEX_VERSION, 'entries': sorted(self.by_id.items())}
+
+
+def load_name_index(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as index_file:
+        data = json.load(index_file)
+    if data.get('version') != NAME_INDEX_VERSION:
+        return None
+    return NameIndex((dex_number, name) for dex_number, name in data['entries'])
+
+
+def save_name_index(index, path):
+    atomic_write(path, lambda index_file: json.dump(index.to_json(), index_file))
+
+
+def build_name_index(species_list_url, client):
+    # species_list_url is the /pokemon-species/ endpoint; one request lists them all
+    response = client.get(species_list_url + "?limit=100000")
+    response.raise_for_status()
+    entries = []
+    for species in response.json()['results']:
+        dex_number = int(species['url'].rstrip('/').rsplit('/', 1)[1])
+        entries.append((dex_number, species['name']))
+    return NameIndex(entries)
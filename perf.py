@@ -0,0 +1,239 @@
+import atexit
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from atomic_file import atomic_write
+
+# Timing spans and counters for the search path: search -> fetch -> display.
+#
+#   with perf.span('fetch.pokemon'):
+#       ...
+#   perf.count('cache.pokemon.hit')
+#
+# Everything is off unless enabled. Disabled, span() hands back one shared
+# do-nothing context manager and count() returns straight away, so the calls
+# can stay in hot paths.
+#
+# Spans and counters are filed under the current Trace (one per search), held
+# in a context variable. Work handed to other threads has to carry the context
+# along: UiExecutor does this, and plain pools can use perf.bind(fn).
+#
+# Environment:
+#   POKEDEX_PERF=1            turn it on
+#   POKEDEX_PERF_LOG=path     also append every span and finished trace to path as JSON lines
+#   POKEDEX_PROFILE=path      turn it on and write a summary of the whole run to path on exit
+
+RECENT_TRACES = 20  # Finished traces kept for the debug panel
+
+ENABLED = False
+counters = {}  # Process-wide totals, trace or not
+recent = deque(maxlen=RECENT_TRACES)
+sinks = []  # Callables receiving every record as a dict
+
+_lock = threading.Lock()
+_current = contextvars.ContextVar('perf_trace', default=None)
+_all_traces = []  # Only kept in profiling mode
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Trace:
+    # The spans and counters of one search
+    def __init__(self, label):
+        self.label = label
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.finished = None
+        self.spans = []  # (name, start offset ms, duration ms, thread name)
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def add_span(self, name, start, end):
+        with self.lock:
+            self.spans.append((name, (start - self.started) * 1000, (end - start) * 1000, threading.current_thread().name))
+
+    def count(self, name, amount):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def total_ms(self):
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return (end - self.started) * 1000
+
+    def breakdown(self):
+        # {span name: (calls, total ms)}, slowest first. Spans nest, so the
+        # totals overlap (fetch.pokemon includes its http span)
+        stages = {}
+        with self.lock:
+            for name, _, duration, _ in self.spans:
+                calls, total = stages.get(name, (0, 0.0))
+                stages[name] = (calls + 1, total + duration)
+        return dict(sorted(stages.items(), key=lambda item: -item[1][1]))
+
+    def to_dict(self):
+        with self.lock:
+            spans = [{'name': name, 'start_ms': round(start, 3), 'ms': round(duration, 3), 'thread': thread}
+                     for name, start, duration, thread in self.spans]
+            trace_counters = dict(self.counters)
+        return {'type': 'trace', 'label': self.label, 'started_at': self.started_at,
+                'total_ms': round(self.total_ms(), 3), 'spans': spans, 'counters': trace_counters}
+
+
+class _Span:
+    __slots__ = ('name', 'trace', 'start')
+
+    def __init__(self, name, trace):
+        self.name = name
+        self.trace = trace
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        if self.trace is not None:
+            self.trace.add_span(self.name, self.start, end)
+        if sinks:
+            _emit({'type': 'span', 'name': self.name, 'ms': round((end - self.start) * 1000, 3),
+                   'trace': self.trace.label if self.trace else None, 'thread': threading.current_thread().name})
+        return False
+
+
+def span(name):
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(name, _current.get())
+
+
+def record(name, seconds):
+    # A span measured some other way, e.g. the time to headers requests reports
+    if not ENABLED:
+        return
+    trace = _current.get()
+    end = time.perf_counter()
+    if trace is not None:
+        trace.add_span(name, end - seconds, end)
+    if sinks:
+        _emit({'type': 'span', 'name': name, 'ms': round(seconds * 1000, 3), 'trace': trace.label if trace else None,
+               'thread': threading.current_thread().name})
+
+
+def count(name, amount=1):
+    if not ENABLED:
+        return
+    with _lock:
+        counters[name] = counters.get(name, 0) + amount
+    trace = _current.get()
+    if trace is not None:
+        trace.count(name, amount)
+
+
+def start_trace(label):
+    # Starts a trace and makes it current in this context; None when disabled
+    if not ENABLED:
+        _current.set(None)
+        return None
+    trace = Trace(label)
+    _current.set(trace)
+    return trace
+
+
+def finish_trace(trace):
+    if trace is None or trace.finished is not None:
+        return
+    trace.finished = time.perf_counter()
+    with _lock:
+        recent.append(trace)
+        if _profile_path:
+            _all_traces.append(trace)
+    if sinks:
+        _emit(trace.to_dict())
+
+
+def bind(fn):
+    # fn, running in a copy of the caller's context wherever it is called, so
+    # spans from pool threads are filed under the caller's trace
+    if not ENABLED:
+        return fn
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
+
+
+def _emit(record):
+    for sink in list(sinks):
+        try:
+            sink(record)
+        except Exception as e:
+            logging.getLogger(__name__).warning("perf sink failed: %s", e)
+
+
+class JsonLinesSink:
+    # Appends each record to a file as one JSON object per line
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def __call__(self, record):
+        line = json.dumps(record)
+        with self.lock:
+            with open(self.path, 'a') as log_file:
+                log_file.write(line + '\n')
+
+
+def logging_sink(record):
+    # Sends records through the logging module as JSON, at DEBUG level
+    logging.getLogger('pokedex.perf').debug(json.dumps(record))
+
+
+def enable(log_path=None):
+    global ENABLED
+    ENABLED = True
+    if log_path:
+        sinks.append(JsonLinesSink(log_path))
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+def summary():
+    # Per-stage totals over every trace kept, plus the process-wide counters
+    with _lock:
+        traces = list(_all_traces) if _profile_path else list(recent)
+        totals = dict(counters)
+    stages = {}
+    for trace in traces:
+        for name, (calls, total) in trace.breakdown().items():
+            stage = stages.setdefault(name, {'calls': 0, 'total_ms': 0.0})
+            stage['calls'] += calls
+            stage['total_ms'] += total
+    for stage in stages.values():
+        stage['mean_ms'] = round(stage['total_ms'] / stage['calls'], 3)
+        stage['total_ms'] = round(stage['total_ms'], 3)
+    return {'traces': [trace.to_dict() for trace in traces], 'stages': stages, 'counters': totals}
+
+
+def dump(path):
+    atomic_write(path, lambda dump_file: json.dump(summary(), dump_file, indent=2))
+
+
+_profile_path = os.environ.get("POKEDEX_PROFILE")
+if os.environ.get("POKEDEX_PERF") == "1" or _profile_path:
+    enable(os.environ.get("POKEDEX_PERF_LOG"))
+if _profile_path:
+    atexit.register(dump, _profile_path)
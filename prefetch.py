@@ -0,0 +1,97 @@
+import heapq
+import itertools
+import threading
+import time
+import requests
+import logic
+from warm import warm_pokemon
+
+# Speculative downloads while the app is idle, so the likely next search is
+# already cached. The app decides *when* (Tk idle time, never during a
+# search); this decides *what* and *how much*:
+#   STARTUP     team, favorites and recent searches from the last session
+#   RELATIVES   the evolution line of the Pokémon just searched
+#   NEIGHBOURS  the national dex numbers either side of it
+# A new search drops the speculative jobs queued for the previous one.
+# Downloads are paced to bytes_per_second, and once max_pokemon Pokémon had
+# to be downloaded the prefetcher stops for the session. Either one set to 0
+# turns prefetching off.
+
+STARTUP, RELATIVES, NEIGHBOURS = 0, 1, 2
+
+
+class Prefetcher:
+    def __init__(self, max_pokemon=50, bytes_per_second=256 * 1024, neighbours=2, sprites=True):
+        self.max_pokemon = max_pokemon
+        self.bytes_per_second = bytes_per_second
+        self.neighbours = neighbours
+        self.sprites = sprites
+        self.lock = threading.Lock()
+        self.queue = []  # (priority, order, job)
+        self.order = itertools.count()
+        self.queued = set()
+        self.done = set()
+        self.downloaded_pokemon = 0
+        self.downloaded_bytes = 0
+
+    def exhausted(self):
+        return self.bytes_per_second <= 0 or self.downloaded_pokemon >= self.max_pokemon
+
+    def _push(self, job, priority):
+        if job in self.queued or job in self.done:
+            return
+        self.queued.add(job)
+        heapq.heappush(self.queue, (priority, next(self.order), job))
+
+    def add(self, names, priority=STARTUP):
+        with self.lock:
+            for name in names:
+                self._push(('pokemon', str(name).lower()), priority)
+
+    def after_search(self, data):
+        # Queues the relatives and neighbours of the Pokémon just shown
+        with self.lock:
+            self.done.add(('pokemon', data['name']))
+            if data.get('id') is not None:
+                self.done.add(('pokemon', str(data['id'])))
+            kept = [item for item in self.queue if item[0] == STARTUP]
+            self.queued = {job for _, _, job in kept}
+            self.queue = kept
+            heapq.heapify(self.queue)
+            self._push(('relatives', data['species_url']), RELATIVES)
+            dex_number = data.get('id')
+            if dex_number and dex_number < 10000:
+                for offset in range(1, self.neighbours + 1):
+                    self._push(('pokemon', str(dex_number + offset)), NEIGHBOURS)
+                    if dex_number - offset >= 1:
+                        self._push(('pokemon', str(dex_number - offset)), NEIGHBOURS)
+
+    def next_job(self):
+        with self.lock:
+            if self.exhausted() or not self.queue:
+                return None
+            _, _, job = heapq.heappop(self.queue)
+            self.queued.discard(job)
+            self.done.add(job)
+            return job
+
+    def run(self, job):
+        # Runs on a worker thread. Returns how long to wait before the next
+        # job to stay within bytes_per_second.
+        before = logic.CLIENT.bytes_received
+        started = time.time()
+        kind, target = job
+        try:
+            if kind == 'relatives':
+                evolution_data = logic.fetch_evolution_data(target)
+                if evolution_data:
+                    self.add(logic.chain_species_names(evolution_data['chain']), RELATIVES)
+            elif warm_pokemon(target, sprites=self.sprites) and logic.CLIENT.bytes_received > before:
+                with self.lock:
+                    self.downloaded_pokemon += 1
+        except (requests.RequestException, ValueError, KeyError):
+            pass  # Offline, unknown name or a bad payload; it's only a guess
+        received = max(0, logic.CLIENT.bytes_received - before)
+        with self.lock:
+            self.downloaded_bytes += received
+        return max(0.0, received / self.bytes_per_second - (time.time() - started))
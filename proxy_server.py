@@ -0,0 +1,349 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import mimetypes
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, quote, urlsplit
+import requests
+import logic
+
+# A local read-through cache in front of PokeAPI, so several tools share one
+# cache and one set of upstream requests:
+#   python proxy_server.py --port 8770
+#   POKEAPI_BASE_URL=http://127.0.0.1:8770/api/v2/ python app.py
+#
+# Serves, in the compact record form (the 'schema' key tells records.from_api
+# it's already compact):
+#   /api/v2/pokemon/<name or id>/
+#   /api/v2/pokemon-species/<name or id>/     and the bare list, for the name index
+#   /api/v2/evolution-chain/<id>/
+#   /api/v2/move/<name>/
+#   /sprites?url=<sprite url>
+#   /metrics                                  throughput and hit rates as JSON
+# Species come in the language of the request's Accept-Language (the first
+# tag, which is what the app sends), or the proxy's POKEDEX_LANGUAGE without
+# one. URLs inside the records are rewritten to point back here. Everything goes
+# through logic's cache, so stale entries are revalidated in the background
+# as usual. Identical requests arriving together share one fetch, and every
+# answer carries an ETag so clients revalidate with a cheap 304.
+#
+# The proxy keeps its cache in its own directory (--data-dir), apart from the
+# app's, since the app stores the rewritten URLs.
+
+PROXY_HOST = "127.0.0.1"
+PROXY_PORT = 8770
+PROXY_DATA_DIR = "proxy_cache"
+PROXY_WORKERS = 16  # Fetches running at once
+THROUGHPUT_WINDOW = 60  # Seconds of requests the requests/s figure covers
+# Hosts sprites may be fetched from, besides the upstream API's own
+SPRITE_HOSTS = {host.strip() for host in os.environ.get("POKEDEX_PROXY_SPRITE_HOSTS", "raw.githubusercontent.com").split(',')
+                if host.strip()}
+
+# API path -> (cache kind, fetch for one identifier). Species also take the
+# language to project them in.
+RESOURCES = {
+    'pokemon': ('pokemon', logic.fetch_pokemon_data),
+    'pokemon-species': ('species', lambda ident, language: logic.fetch_species_data(logic.POKEAPI_SPECIES_URL + ident + '/', language)),
+    'evolution-chain': ('evolution', lambda ident: logic.fetch_evolution_chain(logic.POKEAPI_EVOLUTION_URL + ident + '/')),
+    'move': ('move', logic.fetch_move_data),
+}
+
+STATUS_TEXT = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               500: 'Internal Server Error', 502: 'Bad Gateway'}
+
+
+def is_sprite_url(url):
+    parts = urlsplit(url)
+    allowed = SPRITE_HOSTS | {urlsplit(logic.POKEAPI_BASE_URL).netloc}
+    return parts.scheme in ('http', 'https') and parts.netloc in allowed
+
+
+def rewrite_urls(value, origin):
+    # value with upstream API and sprite URLs pointing at this server instead
+    if isinstance(value, dict):
+        return {key: rewrite_urls(item, origin) for key, item in value.items()}
+    if isinstance(value, list):
+        return [rewrite_urls(item, origin) for item in value]
+    if isinstance(value, str):
+        if value.startswith(logic.POKEAPI_BASE_URL):
+            return origin + '/api/v2/' + value[len(logic.POKEAPI_BASE_URL):]
+        if is_sprite_url(value):
+            return origin + '/sprites?url=' + quote(value, safe='')
+    return value
+
+
+def request_language(accept_language):
+    # First language tag of an Accept-Language header, as PokeAPI names it
+    # ("en", "ja-Hrkt"), or None for none at all
+    tag = (accept_language or '').split(',')[0].split(';')[0].strip()
+    return tag if tag and tag != '*' else None
+
+
+def make_etag(body):
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags or 'W/' + etag in tags
+
+
+def _json_body(value):
+    return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+
+def load_resource(resource, ident, origin, language=None):
+    # Runs on a worker thread. Returns (status, content type, body, cache hit)
+    kind, fetch = RESOURCES[resource]
+    cached = logic.CACHE.get(logic.resolve_key(kind, ident) or '')
+    hit = cached is not None and (language is None or cached['value'].get('language') == language)
+    try:
+        value = fetch(ident, language) if language else fetch(ident)
+    except requests.RequestException:
+        return 502, 'application/json', _json_body({'detail': "Upstream unavailable."}), hit
+    if value is None:
+        # fetch_move_data and co. also give None when the upstream fails, only
+        # a remembered 404 is passed on as one
+        if logic.is_known_missing(kind, ident):
+            return 404, 'application/json', _json_body({'detail': "Not found."}), hit
+        return 502, 'application/json', _json_body({'detail': "Upstream unavailable."}), hit
+    return 200, 'application/json', _json_body(rewrite_urls(value, origin)), hit
+
+
+def load_species_list(origin):
+    # The list the app builds its name index from. All of it in one page,
+    # limit and offset are ignored.
+    try:
+        index = logic.fetch_name_index()
+    except requests.RequestException:
+        return 502, 'application/json', _json_body({'detail': "Upstream unavailable."}), False
+    results = [{'name': name, 'url': f"{origin}/api/v2/pokemon-species/{dex_number}/"}
+               for dex_number, name in sorted(index.by_id.items())]
+    return 200, 'application/json', _json_body({'count': len(results), 'results': results}), True
+
+
+def load_sprite(url):
+    hit = os.path.exists(logic.SPRITES.path_for(url))
+    content = logic.fetch_sprite(url)
+    if content is None:
+        return 502, 'application/json', _json_body({'detail': "Sprite unavailable."}), hit
+    content_type = mimetypes.guess_type(urlsplit(url).path)[0] or 'application/octet-stream'
+    return 200, content_type, content, hit
+
+
+class ProxyMetrics:
+    # Everything here is only touched from the event loop
+    def __init__(self):
+        self.started = time.time()
+        self.requests = 0
+        self.statuses = {}
+        self.resources = {}  # resource -> {'hits', 'misses', 'coalesced', 'not_modified'}
+        self.bytes_sent = 0
+        self.seconds = 0.0
+        self.finished = deque()  # Finish times within THROUGHPUT_WINDOW
+
+    def outcome(self, resource, name):
+        counts = self.resources.setdefault(resource, {'hits': 0, 'misses': 0, 'coalesced': 0, 'not_modified': 0})
+        counts[name] += 1
+
+    def request_done(self, status, sent, seconds):
+        now = time.time()
+        self.requests += 1
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.bytes_sent += sent
+        self.seconds += seconds
+        self.finished.append(now)
+        while self.finished and self.finished[0] < now - THROUGHPUT_WINDOW:
+            self.finished.popleft()
+
+    def to_dict(self, inflight=0):
+        now = time.time()
+        while self.finished and self.finished[0] < now - THROUGHPUT_WINDOW:
+            self.finished.popleft()
+        uptime = now - self.started
+        resources = {}
+        for resource, counts in self.resources.items():
+            # Hit rate: share of answers that didn't need their own upstream call
+            answered = counts['hits'] + counts['misses'] + counts['coalesced']
+            hit_rate = (counts['hits'] + counts['coalesced']) / answered if answered else None
+            resources[resource] = dict(counts, hit_rate=round(hit_rate, 4) if hit_rate is not None else None)
+        return {
+            'uptime_seconds': round(uptime, 1),
+            'requests': self.requests,
+            'requests_per_second': round(len(self.finished) / min(max(uptime, 1e-9), THROUGHPUT_WINDOW), 2),
+            'mean_ms': round(self.seconds / self.requests * 1000, 3) if self.requests else None,
+            'bytes_sent': self.bytes_sent,
+            'statuses': {str(status): count for status, count in sorted(self.statuses.items())},
+            'resources': resources,
+            'inflight': inflight,
+            'upstream_bytes': logic.CLIENT.bytes_received,
+            'sprites': logic.SPRITES.stats(),
+        }
+
+
+class ProxyServer:
+    def __init__(self, host=PROXY_HOST, port=PROXY_PORT, workers=PROXY_WORKERS):
+        self.host = host
+        self.port = port
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='proxy')
+        self.inflight = {}  # request key -> task shared by everyone asking for it
+        self.metrics = ProxyMetrics()
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    def close(self):
+        if self.server:
+            self.server.close()
+        self.pool.shutdown(wait=True)
+        logic.save_cache()
+
+    async def shared(self, key, fn, *args):
+        # One call to fn for everyone asking for key at the same time. Returns
+        # (result, whether this caller joined someone else's call)
+        task = self.inflight.get(key)
+        coalesced = task is not None
+        if task is None:
+            task = asyncio.ensure_future(asyncio.get_running_loop().run_in_executor(self.pool, fn, *args))
+            self.inflight[key] = task
+            task.add_done_callback(lambda _: self.inflight.pop(key, None) if self.inflight.get(key) is task else None)
+        # Shielded so a client hanging up doesn't cancel the fetch for the others
+        return await asyncio.shield(task), coalesced
+
+    async def route(self, method, target, headers):
+        # (status, headers, body) for one request
+        if method not in ('GET', 'HEAD'):
+            return 405, {'Allow': 'GET, HEAD'}, _json_body({'detail': "Method not allowed."})
+        parts = urlsplit(target)
+        origin = 'http://' + headers.get('host', f"{self.host}:{self.port}")
+
+        if parts.path == '/metrics':
+            body = _json_body(self.metrics.to_dict(inflight=len(self.inflight)))
+            return 200, {'Content-Type': 'application/json', 'Cache-Control': 'no-store'}, body
+
+        if parts.path == '/sprites':
+            url = parse_qs(parts.query).get('url', [''])[0]
+            if not is_sprite_url(url):
+                return 400, {'Content-Type': 'application/json'}, _json_body({'detail': "Not a sprite URL."})
+            resource, key, job = 'sprite', ('sprite', url), (load_sprite, url)
+        else:
+            segments = [segment for segment in parts.path.split('/') if segment]
+            if len(segments) < 3 or segments[:2] != ['api', 'v2'] or segments[2] not in RESOURCES or len(segments) > 4:
+                return 404, {'Content-Type': 'application/json'}, _json_body({'detail': "Not found."})
+            resource = segments[2]
+            if len(segments) == 3:
+                if resource != 'pokemon-species':
+                    return 404, {'Content-Type': 'application/json'}, _json_body({'detail': "Not found."})
+                resource, key, job = 'pokemon-species-list', ('list', origin), (load_species_list, origin)
+            else:
+                ident = segments[3].lower()
+                language = None
+                if resource == 'pokemon-species':
+                    language = request_language(headers.get('accept-language')) or logic.LANGUAGE
+                key, job = (resource, ident, origin, language), (load_resource, resource, ident, origin, language)
+
+        (status, content_type, body, hit), coalesced = await self.shared(key, *job)
+        self.metrics.outcome(resource, 'coalesced' if coalesced else 'hits' if hit else 'misses')
+        response_headers = {'Content-Type': content_type}
+        if resource == 'pokemon-species':
+            response_headers['Vary'] = 'Accept-Language'
+        if status != 200:
+            return status, response_headers, body
+        etag = make_etag(body)
+        response_headers['ETag'] = etag
+        if etag_matches(headers.get('if-none-match'), etag):
+            self.metrics.outcome(resource, 'not_modified')
+            return 304, {name: value for name, value in response_headers.items() if name != 'Content-Type'}, b''
+        return status, response_headers, body
+
+    async def handle_connection(self, reader, writer):
+        # Plain HTTP/1.1 with keep-alive, enough for requests and browsers
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                started = time.perf_counter()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                if headers.get('content-length'):
+                    await reader.readexactly(int(headers['content-length']))  # Not used, but must be read past
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+
+                try:
+                    status, response_headers, body = await self.route(method, target, headers)
+                except Exception as e:
+                    status, response_headers, body = 500, {'Content-Type': 'application/json'}, _json_body({'detail': str(e)})
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                response_headers['Content-Length'] = str(len(body))
+                response_headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+                head = f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                head += ''.join(f"{name}: {value}\r\n" for name, value in response_headers.items()) + "\r\n"
+                writer.write(head.encode('latin-1'))
+                if method != 'HEAD':
+                    writer.write(body)
+                await writer.drain()
+                self.metrics.request_done(status, len(body) if method != 'HEAD' else 0, time.perf_counter() - started)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass  # Client went away or sent something we can't read
+        finally:
+            writer.close()
+
+
+async def serve(host, port, workers):
+    server = await ProxyServer(host, port, workers).start()
+    print(f"Serving {logic.POKEAPI_BASE_URL} on http://{host}:{server.port}/ from {os.getcwd()}", file=sys.stderr)
+    print(f"Point the app at it with POKEAPI_BASE_URL=http://{host}:{server.port}/api/v2/", file=sys.stderr)
+    try:
+        await server.serve_forever()
+    finally:
+        server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local caching proxy for PokeAPI, shared by the Pokédex tools.")
+    parser.add_argument('--host', default=PROXY_HOST, help=f"address to listen on (default {PROXY_HOST})")
+    parser.add_argument('--port', type=int, default=PROXY_PORT, help=f"port to listen on (default {PROXY_PORT})")
+    parser.add_argument('--workers', type=int, default=PROXY_WORKERS, help=f"fetches at once (default {PROXY_WORKERS})")
+    parser.add_argument('--data-dir', default=PROXY_DATA_DIR, help=f"where the proxy keeps its cache (default {PROXY_DATA_DIR})")
+    args = parser.parse_args(argv)
+
+    upstream = urlsplit(logic.POKEAPI_BASE_URL)
+    if upstream.port == args.port and upstream.hostname in ('127.0.0.1', 'localhost', args.host):
+        parser.error("POKEAPI_BASE_URL points at this proxy; set it to the real API when starting the proxy")
+    # The cache, sprites and name index are opened lazily, relative to here
+    os.makedirs(args.data_dir, exist_ok=True)
+    os.chdir(args.data_dir)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+from dataclasses import dataclass, fields
+from typing import ClassVar
+
+# Compact records for what the app actually shows. The raw PokeAPI payloads
+# carry every language and sprite variant; only the fields below are cached.
+# Bump a record's SCHEMA_VERSION when its fields change and old cache entries
+# get re-projected the next time they are read.
+
+
+def _pick_language(entries, key, language):
+    for entry in entries or []:
+        if (entry.get('language') or {}).get('name') == language:
+            return entry.get(key) or ''
+    return ''
+
+
+def _clean_text(text):
+    # Flavor text comes with hard line breaks and form feeds from the games
+    return ' '.join(text.replace('\x0c', ' ').split())
+
+
+STAT_NAMES = ['hp', 'attack', 'defense', 'special-attack', 'special-defense', 'speed']
+
+
+@dataclass(slots=True)
+class PokemonRecord:
+    SCHEMA_VERSION: ClassVar[int] = 2
+
+    id: int
+    name: str
+    weight: float
+    height: float
+    types: list
+    moves: list
+    species_url: str
+    sprite_url: str = None
+    animated_sprite_url: str = None
+    stats: dict = None  # Base stats by name, None for entries cached before they were kept
+
+    @classmethod
+    def from_api(cls, data):
+        if 'schema' in data:
+            return cls.from_dict(data)
+        sprites = data.get('sprites') or {}
+        animated = (((sprites.get('versions') or {}).get('generation-v') or {}).get('black-white') or {}).get('animated') or {}
+        if 'species_url' in data:
+            # Projection cached before records existed: weight and height are
+            # already converted and the whole sprites tree was kept
+            return cls(
+                id=data.get('id'),
+                name=data['name'],
+                weight=data['weight'],
+                height=data['height'],
+                types=list(data['types']),
+                moves=list(data['moves']),
+                species_url=data['species_url'],
+                sprite_url=sprites.get('front_default'),
+                animated_sprite_url=animated.get('front_default'),
+            )
+        return cls(
+            id=data['id'],
+            name=data['name'],
+            weight=data['weight'] / 10,
+            height=data['height'] / 10,
+            types=[t['type']['name'] for t in data['types']],
+            moves=[move['move']['name'] for move in data['moves']],
+            species_url=data['species']['url'],
+            sprite_url=sprites.get('front_default'),
+            animated_sprite_url=animated.get('front_default'),
+            stats={stat['stat']['name']: stat['base_stat'] for stat in data.get('stats', [])},
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        sprites = data.get('sprites') or {}
+        return cls(
+            id=data.get('id'),
+            name=data['name'],
+            weight=data['weight'],
+            height=data['height'],
+            types=data['types'],
+            moves=data['moves'],
+            species_url=data['species_url'],
+            sprite_url=sprites.get('front_default'),
+            animated_sprite_url=sprites.get('animated'),
+            stats=data.get('stats'),
+        )
+
+    def to_dict(self):
+        return {
+            'schema': self.SCHEMA_VERSION,
+            'id': self.id,
+            'name': self.name,
+            'weight': self.weight,
+            'height': self.height,
+            'types': self.types,
+            'moves': self.moves,
+            'species_url': self.species_url,
+            'sprites': {'front_default': self.sprite_url, 'animated': self.animated_sprite_url},
+            'stats': self.stats,
+        }
+
+
+@dataclass(slots=True)
+class SpeciesRecord:
+    SCHEMA_VERSION: ClassVar[int] = 1
+
+    id: int
+    name: str
+    language: str
+    flavor_text: str
+    genus: str
+    generation: str
+    evolves_from: str
+    evolution_chain_url: str
+
+    @classmethod
+    def from_api(cls, data, language='en'):
+        if 'schema' in data:
+            return cls.from_dict(data)
+        return cls(
+            id=data['id'],
+            name=data['name'],
+            language=language,
+            flavor_text=_clean_text(_pick_language(data.get('flavor_text_entries'), 'flavor_text', language)),
+            genus=_pick_language(data.get('genera'), 'genus', language),
+            generation=(data.get('generation') or {}).get('name'),
+            evolves_from=(data.get('evolves_from_species') or {}).get('name'),
+            evolution_chain_url=(data.get('evolution_chain') or {}).get('url'),
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{f.name: data.get(f.name) for f in fields(cls)})
+
+    def to_dict(self):
+        data = {'schema': self.SCHEMA_VERSION}
+        data.update({f.name: getattr(self, f.name) for f in fields(self)})
+        return data
+
+
+def _prune_evolution_details(detail):
+    # Only keep the conditions that are actually set, as {'name': ...} refs
+    pruned = {}
+    for key, value in detail.items():
+        if value is None or value is False or value == '':
+            continue
+        if isinstance(value, dict):
+            value = {'name': value.get('name')}
+        pruned[key] = value
+    return pruned
+
+
+def _prune_chain(node):
+    species = node['species']
+    pruned = {
+        'species': {'name': species['name'], 'url': species.get('url')},
+        'evolution_details': [_prune_evolution_details(detail) for detail in node.get('evolution_details', [])],
+        'evolves_to': [_prune_chain(child) for child in node.get('evolves_to', [])],
+    }
+    if node.get('is_baby'):
+        pruned['is_baby'] = True
+    return pruned
+
+
+@dataclass(slots=True)
+class EvolutionChainRecord:
+    SCHEMA_VERSION: ClassVar[int] = 1
+
+    id: int
+    chain: dict
+
+    @classmethod
+    def from_api(cls, data):
+        if 'schema' in data:
+            return cls.from_dict(data)
+        return cls(id=data.get('id'), chain=_prune_chain(data['chain']))
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(id=data.get('id'), chain=data['chain'])
+
+    def to_dict(self):
+        return {'schema': self.SCHEMA_VERSION, 'id': self.id, 'chain': self.chain}
+
+
+@dataclass(slots=True)
+class MoveRecord:
+    SCHEMA_VERSION: ClassVar[int] = 1
+
+    name: str
+    type: str
+    damage_class: str
+    power: int
+    accuracy: int
+    pp: int
+    priority: int
+
+    @classmethod
+    def from_api(cls, data):
+        if 'schema' in data:
+            return cls.from_dict(data)
+        return cls(
+            name=data['name'],
+            type=(data.get('type') or {}).get('name'),
+            damage_class=(data.get('damage_class') or {}).get('name'),
+            power=data.get('power'),
+            accuracy=data.get('accuracy'),
+            pp=data.get('pp'),
+            priority=data.get('priority', 0),
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{f.name: data.get(f.name) for f in fields(cls)})
+
+    def to_dict(self):
+        data = {'schema': self.SCHEMA_VERSION}
+        data.update({f.name: getattr(self, f.name) for f in fields(self)})
+        return data
+
+
+def is_current(record_type, data):
+    return isinstance(data, dict) and data.get('schema') == record_type.SCHEMA_VERSION
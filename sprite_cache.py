@@ -0,0 +1,148 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from PIL import Image, ImageSequence
+import perf
+from atomic_file import atomic_write
+
+DEFAULT_FRAME_MS = 100  # GIFs that don't say how long a frame lasts
+
+
+def _image_bytes(image):
+    return image.width * image.height * len(image.getbands())
+
+
+class SpriteCache:
+    # Two-level cache for sprite images.
+    # - On disk: the downloaded bytes, one file per sprite URL named after the
+    #   URL's hash, trimmed oldest-first once the folder passes disk_budget.
+    # - In memory: decoded and resized PIL images, least recently used ones
+    #   dropped once they take more than memory_budget bytes.
+    def __init__(self, directory, fetch, disk_budget=64 * 1024 * 1024, memory_budget=32 * 1024 * 1024):
+        self.directory = directory
+        self.fetch = fetch  # url -> bytes or None, used on a disk miss
+        self.disk_budget = disk_budget
+        self.memory_budget = memory_budget
+        self.lock = threading.RLock()
+        self.images = OrderedDict()  # (url, size) or (url, 'frames') -> (value, bytes)
+        self.memory_bytes = 0
+        self.disk_bytes = None  # Worked out on first use
+        self.counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'memory_evictions': 0, 'disk_evictions': 0}
+
+    def path_for(self, url):
+        extension = os.path.splitext(url)[1].lower() or '.img'
+        return os.path.join(self.directory, hashlib.sha1(url.encode('utf-8')).hexdigest() + extension)
+
+    def get_bytes(self, url):
+        path = self.path_for(url)
+        try:
+            with open(path, 'rb') as sprite_file:
+                content = sprite_file.read()
+            os.utime(path)  # Keeps recently used sprites at the back of the eviction order
+            with self.lock:
+                self._count('disk_hits')
+            return content
+        except FileNotFoundError:
+            pass
+
+        with self.lock:
+            self._count('misses')
+        content = self.fetch(url)
+        if content:
+            self._store(path, content)
+        return content
+
+    def get_image(self, url, size=None):
+        # A ready-to-use image, resized to size if one is given. Returns None
+        # if the sprite can't be downloaded.
+        key = (url, size)
+        with self.lock:
+            if key in self.images:
+                self.images.move_to_end(key)
+                self._count('memory_hits')
+                return self.images[key][0]
+
+        content = self.get_bytes(url)
+        if not content:
+            return None
+        with perf.span('image.decode'):
+            image = Image.open(io.BytesIO(content))
+            if size:
+                image = image.resize(size, Image.LANCZOS)
+            else:
+                image.load()
+        self._remember(key, image, _image_bytes(image))
+        return image
+
+    def get_frames(self, url):
+        # Every frame of an animated sprite decoded once, as a list of
+        # (RGBA image, duration in ms). Returns None if it can't be downloaded.
+        key = (url, 'frames')
+        with self.lock:
+            if key in self.images:
+                self.images.move_to_end(key)
+                self._count('memory_hits')
+                return self.images[key][0]
+
+        content = self.get_bytes(url)
+        if not content:
+            return None
+        frames = []
+        with perf.span('image.decode_frames'):
+            for frame in ImageSequence.Iterator(Image.open(io.BytesIO(content))):
+                frames.append((frame.convert('RGBA'), frame.info.get('duration') or DEFAULT_FRAME_MS))
+        self._remember(key, frames, sum(_image_bytes(image) for image, _ in frames))
+        return frames
+
+    def _count(self, name):
+        # Called with the lock held
+        self.counters[name] += 1
+        perf.count('sprite.' + name)
+
+    def _remember(self, key, value, cost):
+        with self.lock:
+            if key in self.images:
+                self.memory_bytes -= self.images.pop(key)[1]
+            self.images[key] = (value, cost)
+            self.memory_bytes += cost
+            while self.memory_bytes > self.memory_budget and len(self.images) > 1:
+                _, (_, evicted_cost) = self.images.popitem(last=False)
+                self.memory_bytes -= evicted_cost
+                self._count('memory_evictions')
+
+    def _store(self, path, content):
+        os.makedirs(self.directory, exist_ok=True)
+        atomic_write(path, lambda sprite_file: sprite_file.write(content), mode='wb')
+        with self.lock:
+            if self.disk_bytes is None:
+                self.disk_bytes = self._scan_disk_bytes()
+            else:
+                self.disk_bytes += len(content)
+            if self.disk_bytes > self.disk_budget:
+                self._trim_disk()
+
+    def _scan_disk_bytes(self):
+        return sum(entry.stat().st_size for entry in os.scandir(self.directory) if entry.is_file())
+
+    def _trim_disk(self):
+        entries = sorted((entry for entry in os.scandir(self.directory) if entry.is_file()), key=lambda entry: entry.stat().st_mtime)
+        for entry in entries:
+            if self.disk_bytes <= self.disk_budget:
+                break
+            size = entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+            self.disk_bytes -= size
+            self._count('disk_evictions')
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+            stats['memory_bytes'] = self.memory_bytes
+            stats['memory_images'] = len(self.images)
+            stats['disk_bytes'] = self.disk_bytes
+            return stats
@@ -0,0 +1,213 @@
+import glob
+import json
+import os
+import re
+import struct
+import time
+import numpy as np
+from records import STAT_NAMES
+from team_analysis import TYPES, TYPE_POSITION
+from atomic_file import atomic_write
+
+# Numeric attributes of every cached Pokémon as columns: one array per
+# attribute, stored back to back in a single file and memory-mapped, so a
+# query like "Water types over 100 Speed sorted by weight" is a few vectorized
+# comparisons over the whole Pokédex instead of a walk through the cache.
+#
+# File layout: MAGIC, a 4 byte header length, a JSON header listing every
+# column's dtype and offset, then the columns, each aligned to ALIGN bytes.
+#
+# Readers keep the file mapped, and Windows won't replace or delete a mapped
+# file, so every rebuild goes to a new "pokemon_stats.<time>.<pid>.bin" and
+# readers switch to the newest one. Older versions are deleted once nothing
+# maps them any more (straight away on POSIX, on a later rebuild on Windows).
+
+MAGIC = b'PKSTATS1'
+ALIGN = 64
+MISSING = -1  # Stat value for Pokémon cached before base stats were kept
+
+COLUMNS = [
+    ('id', 'int32'),
+    ('name', 'S40'),
+    *[(stat, 'int16') for stat in STAT_NAMES],
+    ('total', 'int16'),
+    ('weight', 'float32'),
+    ('height', 'float32'),
+    ('types', 'uint32'),  # Bit i set = has TYPES[i]
+    ('generation', 'int8'),  # 0 = unknown
+]
+SORT_KEYS = ('id', 'name', *STAT_NAMES, 'total', 'weight', 'height', 'generation')
+
+# Last national dex number introduced by each generation
+_GENERATION_ENDS = [151, 251, 386, 493, 649, 721, 809, 905, 1025]
+
+
+def generation_for(dex_number):
+    # The /pokemon/ payload doesn't say which generation it's from, but dex
+    # numbers are handed out in order. Alternate forms (ids over 10000) are 0.
+    if not dex_number:
+        return 0
+    for generation, last in enumerate(_GENERATION_ENDS, 1):
+        if dex_number <= last:
+            return generation
+    return 0
+
+
+def type_bits(types):
+    bits = 0
+    for name in types:
+        if name in TYPE_POSITION:
+            bits |= 1 << TYPE_POSITION[name]
+    return bits
+
+
+def _aligned(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def write_stats_table(pokemon, path, source=None):
+    # pokemon: compact Pokémon dicts (see logic.cached_pokemon). Written to a
+    # temporary file and swapped in, so readers never see half a table.
+    pokemon = sorted(pokemon, key=lambda data: (data.get('id') or 0, data['name']))
+    rows = len(pokemon)
+    arrays = {name: np.zeros(rows, dtype=dtype) for name, dtype in COLUMNS}
+    for row, data in enumerate(pokemon):
+        stats = data.get('stats') or {}
+        arrays['id'][row] = data.get('id') or 0
+        arrays['name'][row] = data['name'].encode('utf-8')
+        for stat in STAT_NAMES:
+            arrays[stat][row] = stats.get(stat, MISSING)
+        arrays['total'][row] = sum(stats.get(stat, 0) for stat in STAT_NAMES) if stats else MISSING
+        arrays['weight'][row] = data['weight']
+        arrays['height'][row] = data['height']
+        arrays['types'][row] = type_bits(data['types'])
+        arrays['generation'][row] = generation_for(data.get('id'))
+
+    columns = []
+    offset = 0
+    for name, dtype in COLUMNS:
+        columns.append({'name': name, 'dtype': dtype, 'offset': offset})
+        offset = _aligned(offset + arrays[name].nbytes)
+    header = json.dumps({'rows': rows, 'source': source, 'columns': columns}).encode('utf-8')
+    data_start = _aligned(len(MAGIC) + 4 + len(header))
+
+    def write(stats_file):
+        stats_file.write(MAGIC + struct.pack('<I', len(header)) + header)
+        for column in columns:
+            stats_file.seek(data_start + column['offset'])
+            stats_file.write(arrays[column['name']].tobytes())
+
+    atomic_write(path, write, mode='wb')
+
+
+def _versioned_path(path):
+    base, extension = os.path.splitext(path)
+    return f"{base}.{time.time_ns():020d}.{os.getpid()}{extension}"
+
+
+def stats_table_versions(path):
+    # Every rebuilt table for path, oldest first
+    base, extension = os.path.splitext(path)
+    pattern = re.compile(re.escape(os.path.basename(base)) + r'\.\d{20}\.\d+' + re.escape(extension) + '$')
+    candidates = glob.glob(glob.escape(base) + '.*' + extension)
+    return sorted(candidate for candidate in candidates if pattern.match(os.path.basename(candidate)))
+
+
+def save_stats_table(pokemon, path, source=None):
+    # Writes a new version of the table for path and returns where it went
+    new_path = _versioned_path(path)
+    write_stats_table(pokemon, new_path, source)
+    for old_path in [path, *stats_table_versions(path)]:
+        if old_path != new_path and os.path.exists(old_path):
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass  # Still mapped somewhere (Windows), removed on a later rebuild
+    return new_path
+
+
+class StatsTable:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as stats_file:
+            if stats_file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a stats table")
+            header_length, = struct.unpack('<I', stats_file.read(4))
+            header = json.loads(stats_file.read(header_length))
+        self.rows = header['rows']
+        self.source = header['source']
+        data_start = _aligned(len(MAGIC) + 4 + header_length)
+        self.columns = {}
+        for column in header['columns']:
+            if self.rows:
+                self.columns[column['name']] = np.memmap(path, dtype=column['dtype'], mode='r',
+                                                         offset=data_start + column['offset'], shape=(self.rows,))
+            else:
+                self.columns[column['name']] = np.zeros(0, dtype=column['dtype'])
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def names(self):
+        return [name.decode('utf-8') for name in self.columns['name']]
+
+    def type_flags(self):
+        # (rows, 18) 0/1 type flags, the layout team_analysis works with
+        bits = self.columns['types'][:, None] >> np.arange(len(TYPES), dtype=np.uint32)
+        return (bits & 1).astype(np.float32)
+
+    def query(self, types=(), generation=None, minimum=None, maximum=None, sort_by='id', descending=False, limit=None):
+        # Row numbers of the Pokémon having all of types, from generation,
+        # with every column in minimum/maximum within bounds, sorted on any of
+        # SORT_KEYS. Pokémon with no value for the sort key go last.
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"Can't sort Pokémon by '{sort_by}'")
+        mask = np.ones(self.rows, dtype=bool)
+        if types:
+            wanted = type_bits(types)
+            mask &= (self.columns['types'] & wanted) == wanted
+        if generation:
+            mask &= self.columns['generation'] == generation
+        for name, bound in (minimum or {}).items():
+            mask &= self.columns[name] >= bound
+        for name, bound in (maximum or {}).items():
+            column = self.columns[name]
+            mask &= (column <= bound) & (column != MISSING)
+        rows = np.flatnonzero(mask)
+
+        values = self.columns[sort_by][rows]
+        missing = values == MISSING if values.dtype.kind in 'iu' else np.zeros(len(rows), dtype=bool)
+        if descending:
+            # Reversed so ties keep their dex order
+            order = np.lexsort((-np.arange(len(rows)), values, ~missing))[::-1]
+        else:
+            order = np.lexsort((values, missing))
+        rows = rows[order]
+        return rows[:limit] if limit is not None else rows
+
+    def row(self, index):
+        data = {name: column[index].item() for name, column in self.columns.items()}
+        data['name'] = data['name'].decode('utf-8')
+        data['types'] = [TYPES[i] for i in range(len(TYPES)) if data['types'] >> i & 1]
+        return data
+
+
+def load_stats_table(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        return StatsTable(path)
+    except (ValueError, KeyError, OSError):
+        return None  # Written by another version or damaged, it gets rebuilt
+
+
+def load_latest_stats_table(path):
+    # The newest readable version of the table for path, or None
+    for candidate in reversed(stats_table_versions(path)):
+        table = load_stats_table(candidate)
+        if table is not None:
+            return table
+    return None
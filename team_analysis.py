@@ -0,0 +1,130 @@
+import numpy as np
+
+# Team Builder maths. Types are columns of an 18x18 effectiveness matrix and
+# every Pokémon is a row of 0/1 type flags, so a whole roster is scored with a
+# few matrix operations instead of Python loops. Offense is estimated from a
+# Pokémon's own types (same-type attacks), since movesets vary.
+
+TYPES = [
+    'normal', 'fire', 'water', 'electric', 'grass', 'ice', 'fighting', 'poison', 'ground',
+    'flying', 'psychic', 'bug', 'rock', 'ghost', 'dragon', 'dark', 'steel', 'fairy',
+]
+TYPE_POSITION = {name: position for position, name in enumerate(TYPES)}
+
+# Attacking type -> defending types that don't take normal damage
+_CHART = {
+    'normal': {'rock': 0.5, 'ghost': 0, 'steel': 0.5},
+    'fire': {'fire': 0.5, 'water': 0.5, 'grass': 2, 'ice': 2, 'bug': 2, 'rock': 0.5, 'dragon': 0.5, 'steel': 2},
+    'water': {'fire': 2, 'water': 0.5, 'grass': 0.5, 'ground': 2, 'rock': 2, 'dragon': 0.5},
+    'electric': {'water': 2, 'electric': 0.5, 'grass': 0.5, 'ground': 0, 'flying': 2, 'dragon': 0.5},
+    'grass': {'fire': 0.5, 'water': 2, 'grass': 0.5, 'poison': 0.5, 'ground': 2, 'flying': 0.5, 'bug': 0.5,
+              'rock': 2, 'dragon': 0.5, 'steel': 0.5},
+    'ice': {'fire': 0.5, 'water': 0.5, 'grass': 2, 'ice': 0.5, 'ground': 2, 'flying': 2, 'dragon': 2, 'steel': 0.5},
+    'fighting': {'normal': 2, 'ice': 2, 'poison': 0.5, 'flying': 0.5, 'psychic': 0.5, 'bug': 0.5, 'rock': 2,
+                 'ghost': 0, 'dark': 2, 'steel': 2, 'fairy': 0.5},
+    'poison': {'grass': 2, 'poison': 0.5, 'ground': 0.5, 'rock': 0.5, 'ghost': 0.5, 'steel': 0, 'fairy': 2},
+    'ground': {'fire': 2, 'electric': 2, 'grass': 0.5, 'poison': 2, 'flying': 0, 'bug': 0.5, 'rock': 2, 'steel': 2},
+    'flying': {'electric': 0.5, 'grass': 2, 'fighting': 2, 'bug': 2, 'rock': 0.5, 'steel': 0.5},
+    'psychic': {'fighting': 2, 'poison': 2, 'psychic': 0.5, 'dark': 0, 'steel': 0.5},
+    'bug': {'fire': 0.5, 'grass': 2, 'fighting': 0.5, 'poison': 0.5, 'flying': 0.5, 'psychic': 2, 'ghost': 0.5,
+            'dark': 2, 'steel': 0.5, 'fairy': 0.5},
+    'rock': {'fire': 2, 'ice': 2, 'fighting': 0.5, 'ground': 0.5, 'flying': 2, 'bug': 2, 'steel': 0.5},
+    'ghost': {'normal': 0, 'psychic': 2, 'ghost': 2, 'dark': 0.5},
+    'dragon': {'dragon': 2, 'steel': 0.5, 'fairy': 0},
+    'dark': {'fighting': 0.5, 'psychic': 2, 'ghost': 2, 'dark': 0.5, 'fairy': 0.5},
+    'steel': {'fire': 0.5, 'water': 0.5, 'electric': 0.5, 'ice': 2, 'rock': 2, 'steel': 0.5, 'fairy': 2},
+    'fairy': {'fire': 0.5, 'fighting': 2, 'poison': 0.5, 'dragon': 2, 'dark': 2, 'steel': 0.5},
+}
+
+# EFFECTIVENESS[attacker, defender]
+EFFECTIVENESS = np.ones((len(TYPES), len(TYPES)), dtype=np.float32)
+for _attacker, _row in _CHART.items():
+    for _defender, _multiplier in _row.items():
+        EFFECTIVENESS[TYPE_POSITION[_attacker], TYPE_POSITION[_defender]] = _multiplier
+
+# Dual types multiply, so defence is a sum in log space; immunities (0x) are
+# tracked separately because log(0) doesn't exist
+_LOG_EFFECTIVENESS = np.log2(np.where(EFFECTIVENESS > 0, EFFECTIVENESS, 1)).T
+_IMMUNE = (EFFECTIVENESS == 0).astype(np.float32).T
+_SUPER_EFFECTIVE = (EFFECTIVENESS > 1).astype(np.float32)
+
+
+def type_masks(types_list):
+    masks = np.zeros((len(types_list), len(TYPES)), dtype=np.float32)
+    for row, types in enumerate(types_list):
+        for name in types:
+            if name in TYPE_POSITION:
+                masks[row, TYPE_POSITION[name]] = 1
+    return masks
+
+
+def defense_multipliers(masks):
+    # (n, 18) type flags -> (n, 18) damage taken from each attacking type
+    multipliers = np.exp2(masks @ _LOG_EFFECTIVENESS)
+    multipliers[(masks @ _IMMUNE) > 0] = 0
+    return multipliers
+
+
+def offensive_coverage(masks):
+    # (n, 18) type flags -> (n, 18) True where a same-type attack is super effective
+    return (masks @ _SUPER_EFFECTIVE) > 0
+
+
+class Roster:
+    # Names and (n, 18) type flags of every Pokémon that can be recommended
+    def __init__(self, names, masks):
+        self.names = list(names)
+        self.masks = masks
+        self.defense = defense_multipliers(self.masks)
+        self.coverage = offensive_coverage(self.masks)
+
+    @classmethod
+    def from_stats_table(cls, table):
+        return cls(table.names(), table.type_flags())
+
+    def __len__(self):
+        return len(self.names)
+
+
+def analyze_team(team_types):
+    # team_types: one list of type names per member
+    masks = type_masks(team_types)
+    defense = defense_multipliers(masks)
+    coverage = offensive_coverage(masks).any(axis=0) if len(team_types) else np.zeros(len(TYPES), dtype=bool)
+    weak = (defense > 1).sum(axis=0)
+    resist = (defense < 1).sum(axis=0)
+    return {
+        'coverage': [TYPES[i] for i in np.flatnonzero(coverage)],
+        'uncovered': [TYPES[i] for i in np.flatnonzero(~coverage)],
+        'weaknesses': {TYPES[i]: int(weak[i]) for i in np.flatnonzero(weak)},
+        'resistances': {TYPES[i]: int(resist[i]) for i in np.flatnonzero(resist)},
+        # Types more of the team is weak to than resists
+        'shared_weaknesses': [TYPES[i] for i in np.flatnonzero((weak >= 2) & (weak > resist))],
+    }
+
+
+def recommend_members(team_types, roster, exclude=(), limit=5):
+    # Scores every roster entry as the next team member in one pass:
+    # + new types the team could hit super effectively
+    # + resistances to types the team is currently weak to
+    # - weaknesses that would then be shared by three or more members
+    if not len(roster):
+        return []
+    masks = type_masks(team_types)
+    defense = defense_multipliers(masks)
+    weak = (defense > 1).sum(axis=0)
+    resist = (defense < 1).sum(axis=0)
+    covered = offensive_coverage(masks).any(axis=0) if len(team_types) else np.zeros(len(TYPES), dtype=bool)
+
+    new_coverage = (roster.coverage & ~covered).sum(axis=1)
+    patched = ((roster.defense < 1) & (weak > resist)).sum(axis=1)
+    stacked = ((weak + (roster.defense > 1)) >= 3).sum(axis=1)
+    scores = 2.0 * new_coverage + 1.5 * patched - 2.0 * stacked
+
+    excluded = set(exclude)
+    if excluded:
+        scores[[position for position, name in enumerate(roster.names) if name in excluded]] = -np.inf
+    limit = min(limit, len(roster))
+    best = np.argpartition(-scores, limit - 1)[:limit]
+    best = best[np.argsort(-scores[best])]
+    return [(roster.names[i], float(scores[i])) for i in best if np.isfinite(scores[i])]
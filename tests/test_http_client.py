@@ -0,0 +1,51 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_client import HttpClient
+
+
+class FakeTransport:
+    # Stands in for RequestsTransport, answering from a list of responses
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.sent = []
+
+    def send(self, method, url, headers=None, timeout=None):
+        self.sent.append((method, url))
+        return self.responses.pop(0)
+
+    def close(self):
+        pass
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None, content=b''):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = content
+
+
+class HttpClientRetryTests(unittest.TestCase):
+    def test_retries_after_429(self):
+        transport = FakeTransport([FakeResponse(429, {'Retry-After': '0'}), FakeResponse(200, content=b'{}')])
+        client = HttpClient(transport=transport, retries=2)
+        self.assertEqual(client.get("http://pokeapi.test/api/v2/pokemon/1").status_code, 200)
+        self.assertEqual(len(transport.sent), 2)
+
+    def test_waits_as_long_as_retry_after_says(self):
+        client = HttpClient(transport=FakeTransport([]), max_backoff=30)
+        self.assertEqual(client.retry_delay(0, FakeResponse(429, {'Retry-After': '7'})), 7)
+        self.assertEqual(client.retry_delay(0, FakeResponse(429, {'Retry-After': '120'})), 30)
+
+    def test_gives_up_after_the_last_retry(self):
+        transport = FakeTransport([FakeResponse(503, {'Retry-After': '0'})] * 3)
+        client = HttpClient(transport=transport, retries=2)
+        self.assertEqual(client.get("http://pokeapi.test/api/v2/pokemon/1").status_code, 503)
+        self.assertEqual(len(transport.sent), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prefetch import STARTUP, Prefetcher
+
+
+def pikachu():
+    return {'id': 25, 'name': 'pikachu', 'species_url': "https://pokeapi.co/api/v2/pokemon-species/25/"}
+
+
+class PrefetcherTests(unittest.TestCase):
+    def test_startup_names_come_first(self):
+        prefetcher = Prefetcher()
+        prefetcher.after_search(pikachu())
+        prefetcher.add(['eevee'], STARTUP)
+        self.assertEqual(prefetcher.next_job(), ('pokemon', 'eevee'))
+        self.assertEqual(prefetcher.next_job()[0], 'relatives')
+
+    def test_new_search_drops_the_previous_guesses(self):
+        prefetcher = Prefetcher(neighbours=1)
+        prefetcher.add(['eevee'], STARTUP)
+        prefetcher.after_search(pikachu())
+        prefetcher.after_search(dict(pikachu(), id=133, name='eevee', species_url="https://pokeapi.co/api/v2/pokemon-species/133/"))
+        jobs = []
+        while True:
+            job = prefetcher.next_job()
+            if job is None:
+                break
+            jobs.append(job)
+        self.assertNotIn(('pokemon', '24'), jobs)
+        self.assertNotIn(('pokemon', '26'), jobs)
+        self.assertIn(('pokemon', '134'), jobs)
+
+    def test_zero_max_pokemon_turns_it_off(self):
+        prefetcher = Prefetcher(max_pokemon=0)
+        prefetcher.add(['eevee'], STARTUP)
+        self.assertIsNone(prefetcher.next_job())
+
+    def test_zero_bytes_per_second_turns_it_off(self):
+        prefetcher = Prefetcher(bytes_per_second=0)
+        prefetcher.add(['eevee'], STARTUP)
+        prefetcher.after_search(pikachu())
+        self.assertTrue(prefetcher.exhausted())
+        self.assertIsNone(prefetcher.next_job())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,202 @@
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logic
+import warm
+from cache_store import LazyCache, open_store
+from http_client import HttpClient
+
+# warm against a local stand-in for PokeAPI: three Pokémon in one evolution
+# chain, with raw API shaped payloads and real PNG sprites.
+
+DEX = [1, 2, 3]
+
+
+def _png():
+    buffer = io.BytesIO()
+    Image.new('RGBA', (2, 2), (255, 0, 0, 255)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class StubPokeApi:
+    def __init__(self):
+        self.requests = []  # Paths, in the order they were asked for
+        self.rate_limit_once = set()  # Paths answered with a 429 the first time
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with stub.lock:
+                    stub.requests.append(self.path)
+                    limited = self.path in stub.rate_limit_once
+                    stub.rate_limit_once.discard(self.path)
+                if limited:
+                    self.send_response(429)
+                    self.send_header('Retry-After', '0')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                status, content_type, body = stub.route(self.path)
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.origin = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.base_url = self.origin + "/api/v2/"
+        self.sprite = _png()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def count(self, path):
+        with self.lock:
+            return self.requests.count(path)
+
+    def chain_node(self, dex_number):
+        return {
+            'species': {'name': f"mon{dex_number}", 'url': f"{self.base_url}pokemon-species/{dex_number}/"},
+            'evolution_details': [{'trigger': {'name': 'level-up'}, 'min_level': 16}] if dex_number > 1 else [],
+            'evolves_to': [self.chain_node(dex_number + 1)] if dex_number < DEX[-1] else [],
+        }
+
+    def route(self, path):
+        parts = [part for part in path.split('/') if part]
+        if parts[:1] == ['sprites']:
+            return 200, 'image/png', self.sprite
+        if len(parts) != 4 or parts[:2] != ['api', 'v2'] or not parts[3].isdigit() or int(parts[3]) not in DEX:
+            return 404, 'application/json', b'{"detail": "Not found."}'
+        resource, dex_number = parts[2], int(parts[3])
+        if resource == 'pokemon':
+            data = {
+                'id': dex_number,
+                'name': f"mon{dex_number}",
+                'weight': 69,
+                'height': 7,
+                'types': [{'slot': 1, 'type': {'name': 'grass'}}],
+                'moves': [{'move': {'name': 'tackle'}}],
+                'species': {'url': f"{self.base_url}pokemon-species/{dex_number}/"},
+                'sprites': {'front_default': f"{self.origin}/sprites/{dex_number}.png"},
+                'stats': [{'stat': {'name': 'hp'}, 'base_stat': 45}],
+            }
+        elif resource == 'pokemon-species':
+            data = {
+                'id': dex_number,
+                'name': f"mon{dex_number}",
+                'flavor_text_entries': [{'flavor_text': "A seed.", 'language': {'name': 'en'}}],
+                'genera': [{'genus': "Seed Pokémon", 'language': {'name': 'en'}}],
+                'generation': {'name': 'generation-i'},
+                'evolves_from_species': {'name': f"mon{dex_number - 1}"} if dex_number > 1 else None,
+                'evolution_chain': {'url': f"{self.base_url}evolution-chain/1/"},
+            }
+        elif resource == 'evolution-chain':
+            data = {'id': 1, 'chain': self.chain_node(1)}
+        else:
+            return 404, 'application/json', b'{"detail": "Not found."}'
+        return 200, 'application/json', json.dumps(data).encode('utf-8')
+
+
+class WarmTests(unittest.TestCase):
+    def setUp(self):
+        self.stub = StubPokeApi()
+        self.addCleanup(self.stub.close)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        previous_directory = os.getcwd()
+        os.chdir(self.directory.name)
+        self.addCleanup(os.chdir, previous_directory)
+
+        # A fresh cache in the temporary directory, pointed at the stub
+        saved = {name: getattr(logic, name) for name in
+                 ('POKEAPI_BASE_URL', 'POKEAPI_URL', 'POKEAPI_SPECIES_URL', 'POKEAPI_EVOLUTION_URL', 'CACHE', 'CLIENT',
+                  '_stats_table')}
+
+        def restore():
+            logic.CACHE.close()
+            for name, value in saved.items():
+                setattr(logic, name, value)
+
+        self.addCleanup(restore)
+        logic.POKEAPI_BASE_URL = self.stub.base_url
+        logic.POKEAPI_URL = self.stub.base_url + "pokemon/"
+        logic.POKEAPI_SPECIES_URL = self.stub.base_url + "pokemon-species/"
+        logic.POKEAPI_EVOLUTION_URL = self.stub.base_url + "evolution-chain/"
+        logic.CACHE = LazyCache(lambda: open_store('sqlite', logic.CACHE_FILE, logic.CACHE_DB_FILE))
+        logic.CLIENT = HttpClient(retries=2, backoff=0)
+        logic._stats_table = None
+        logic._aliases.clear()
+        self.messages = []
+
+    def warm(self, **options):
+        options.setdefault('workers', 2)
+        return warm.warm_cache(DEX, progress_file=warm.WARM_PROGRESS_FILE, report=self.messages.append, **options)
+
+    def test_fills_pokemon_species_chain_and_sprites(self):
+        result = self.warm()
+        self.assertEqual(result['warmed'], len(DEX))
+        self.assertEqual(result['failed'], [])
+        for dex_number in DEX:
+            self.assertIn(f"pokemon:{dex_number}", logic.CACHE)
+            self.assertIn(f"species:{dex_number}", logic.CACHE)
+            self.assertTrue(os.path.exists(logic.SPRITES.path_for(f"{self.stub.origin}/sprites/{dex_number}.png")))
+        self.assertIn("evolution:1", logic.CACHE)
+        self.assertEqual(self.stub.count("/api/v2/evolution-chain/1/"), 1)
+
+        # Everything is now served without the network
+        requests_before = len(self.stub.requests)
+        self.assertEqual(logic.fetch_pokemon_data("mon2")['id'], 2)
+        self.assertEqual(logic.chain_species_names(logic.fetch_evolution_data(logic.POKEAPI_SPECIES_URL + "3/")['chain']),
+                         ["mon1", "mon2", "mon3"])
+        self.assertEqual(len(self.stub.requests), requests_before)
+
+    def test_interrupted_run_resumes_from_progress_file(self):
+        warm_pokemon = warm.warm_pokemon
+
+        def interrupted(dex_number, sprites=True):
+            if dex_number == 3:
+                raise KeyboardInterrupt
+            return warm_pokemon(dex_number, sprites)
+
+        warm.warm_pokemon = interrupted
+        try:
+            with self.assertRaises(KeyboardInterrupt):
+                self.warm(workers=1)
+        finally:
+            warm.warm_pokemon = warm_pokemon
+        with open(warm.WARM_PROGRESS_FILE) as progress_file:
+            self.assertEqual(json.load(progress_file)['done'], [1, 2])
+
+        result = self.warm(workers=1)
+        self.assertEqual(result['warmed'], 1)
+        self.assertIn("Resuming: 2 already warmed, 1 to go", self.messages)
+        self.assertEqual(self.stub.count("/api/v2/pokemon/1"), 1)
+        self.assertEqual(self.stub.count("/api/v2/pokemon/3"), 1)
+        self.assertEqual(warm.load_progress(warm.WARM_PROGRESS_FILE), set(DEX))
+
+    def test_rate_limited_request_is_retried(self):
+        self.stub.rate_limit_once.add("/api/v2/pokemon/2")
+        result = self.warm()
+        self.assertEqual(result['failed'], [])
+        self.assertEqual(self.stub.count("/api/v2/pokemon/2"), 2)
+        self.assertIn("pokemon:2", logic.CACHE)
+
+
+if __name__ == '__main__':
+    unittest.main()
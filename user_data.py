@@ -0,0 +1,33 @@
+import json
+import os
+from atomic_file import atomic_write
+
+# Search history, favorites and team, kept between runs. Written to a
+# temporary file and renamed into place, so a crash never leaves half a file.
+
+USER_DATA_VERSION = 1
+
+
+def empty_user_data():
+    return {'history': [], 'favorites': [], 'team': []}
+
+
+def load_user_data(path):
+    data = empty_user_data()
+    if not os.path.exists(path):
+        return data
+    try:
+        with open(path, 'r') as user_file:
+            stored = json.load(user_file)
+    except (OSError, ValueError):
+        return data  # Unreadable, start over rather than refuse to start
+    if stored.get('version') != USER_DATA_VERSION:
+        return data
+    for key in data:
+        data[key] = [name for name in stored.get(key, []) if isinstance(name, str)]
+    return data
+
+
+def save_user_data(path, history, favorites, team):
+    data = {'version': USER_DATA_VERSION, 'history': history, 'favorites': favorites, 'team': team}
+    atomic_write(path, lambda user_file: json.dump(data, user_file))
@@ -0,0 +1,127 @@
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import logic
+from atomic_file import atomic_write
+
+# Fills the cache ahead of time so the app can run offline:
+#   python logic.py warm --range 1-1025 --workers 8
+# Finished dex numbers are written to WARM_PROGRESS_FILE as they complete, so an
+# interrupted run picks up where it stopped.
+
+WARM_PROGRESS_FILE = "warm_progress.json"
+REPORT_EVERY = 5  # Seconds between progress lines
+
+
+def parse_range(text):
+    # "1-151,200,250-251" -> [1, ..., 151, 200, 250, 251]
+    ids = []
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            ids.extend(range(int(start), int(end) + 1))
+        else:
+            ids.append(int(part))
+    return ids
+
+
+def load_progress(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path, 'r') as progress_file:
+        return set(json.load(progress_file).get('done', []))
+
+
+def save_progress(path, done):
+    atomic_write(path, lambda progress_file: json.dump({'done': sorted(done)}, progress_file))
+
+
+def warm_pokemon(dex_number, sprites=True):
+    # Everything the app would fetch when this Pokémon is searched
+    data = logic.fetch_pokemon_data(str(dex_number))
+    if not data:
+        return False
+    logic.fetch_species_data(data['species_url'])
+    logic.fetch_evolution_data(data['species_url'])
+    if sprites:
+        for sprite_url in data['sprites'].values():
+            if sprite_url:
+                logic.fetch_sprite(sprite_url)
+    return True
+
+
+def warm_cache(ids, workers=8, sprites=True, progress_file=WARM_PROGRESS_FILE, report=print):
+    done = load_progress(progress_file) if progress_file else set()
+    todo = [dex_number for dex_number in ids if dex_number not in done]
+    if len(todo) < len(ids):
+        report(f"Resuming: {len(ids) - len(todo)} already warmed, {len(todo)} to go")
+
+    lock = threading.Lock()
+    failed = []
+    finished = 0
+    started = time.time()
+    last_report = started
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    futures = {pool.submit(warm_pokemon, dex_number, sprites): dex_number for dex_number in todo}
+    try:
+        for future in as_completed(futures):
+            dex_number = futures[future]
+            try:
+                ok = future.result()
+            except Exception as e:
+                report(f"#{dex_number} failed: {e}")
+                ok = False
+            with lock:
+                finished += 1
+                if ok:
+                    done.add(dex_number)
+                else:
+                    failed.append(dex_number)
+            now = time.time()
+            if now - last_report >= REPORT_EVERY:
+                last_report = now
+                if progress_file:
+                    save_progress(progress_file, done)
+                report(f"{finished}/{len(todo)} warmed, {finished / (now - started):.1f} Pokémon/s, {len(failed)} failed")
+    except KeyboardInterrupt:
+        report("Interrupted, run the same command again to resume")
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    finally:
+        if progress_file:
+            save_progress(progress_file, done)
+        logic.save_cache()
+    pool.shutdown()
+    logic.fetch_stats_table()  # So the Browse tab opens straight away
+
+    elapsed = time.time() - started
+    rate = finished / elapsed if elapsed > 0 else 0.0
+    report(f"Done: {finished - len(failed)} warmed, {len(failed)} failed in {elapsed:.1f}s ({rate:.1f} Pokémon/s)")
+    if failed:
+        report(f"Failed: {', '.join(str(dex_number) for dex_number in sorted(failed))}")
+    return {'warmed': finished - len(failed), 'failed': sorted(failed), 'seconds': elapsed, 'rate': rate}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python logic.py warm", description="Fill the Pokédex cache ahead of time.")
+    parser.add_argument('--range', default="1-1025", help="dex numbers to warm, e.g. 1-151,250 (default 1-1025)")
+    parser.add_argument('--workers', type=int, default=8, help="concurrent downloads (default 8)")
+    parser.add_argument('--no-sprites', action='store_true', help="skip downloading sprites")
+    parser.add_argument('--progress-file', default=WARM_PROGRESS_FILE, help="where finished dex numbers are recorded")
+    parser.add_argument('--restart', action='store_true', help="ignore previous progress")
+    args = parser.parse_args(argv)
+
+    if args.restart and os.path.exists(args.progress_file):
+        os.remove(args.progress_file)
+    try:
+        result = warm_cache(parse_range(args.range), workers=args.workers, sprites=not args.no_sprites, progress_file=args.progress_file)
+    except KeyboardInterrupt:
+        return 130
+    return 1 if result['failed'] else 0